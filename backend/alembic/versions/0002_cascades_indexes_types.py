@@ -0,0 +1,115 @@
+"""cascades, indexes, column types and ai_analysis_cache
+
+Brings a baseline (0001) database up to the current models:
+- ON DELETE CASCADE on every foreign key
+- TIMESTAMPTZ timestamps with server-side now() defaults
+- Composite lookup indexes for projects, scans and scan points
+- Coordinates as double precision, small counters as smallint
+- The ai_analysis_cache table
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-14 18:02:41.511207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (constraint, table, column, referred table); names are Postgres' defaults
+FOREIGN_KEYS = [
+    ('projects_user_id_fkey', 'projects', 'user_id', 'users'),
+    ('scans_project_id_fkey', 'scans', 'project_id', 'projects'),
+    ('scan_points_scan_id_fkey', 'scan_points', 'scan_id', 'scans'),
+]
+
+# Naive UTC timestamps (datetime.utcnow) in the baseline
+TIMESTAMP_COLUMNS = [
+    ('users', 'created_at'),
+    ('projects', 'created_at'),
+    ('projects', 'updated_at'),
+    ('scans', 'executed_at'),
+]
+
+# (table, column, baseline type, current type)
+COLUMN_TYPES = [
+    ('projects', 'central_lat', sa.Numeric(10, 8), sa.Float(precision=53)),
+    ('projects', 'central_lng', sa.Numeric(11, 8), sa.Float(precision=53)),
+    ('projects', 'default_grid_size', sa.Integer(), sa.SmallInteger()),
+    ('scans', 'grid_size', sa.Integer(), sa.SmallInteger()),
+    ('scans', 'top3_count', sa.Integer(), sa.SmallInteger()),
+    ('scans', 'top10_count', sa.Integer(), sa.SmallInteger()),
+    ('scan_points', 'grid_x', sa.Integer(), sa.SmallInteger()),
+    ('scan_points', 'grid_y', sa.Integer(), sa.SmallInteger()),
+    ('scan_points', 'latitude', sa.Numeric(10, 8), sa.Float(precision=53)),
+    ('scan_points', 'longitude', sa.Numeric(11, 8), sa.Float(precision=53)),
+    ('scan_points', 'rank_position', sa.Integer(), sa.SmallInteger()),
+]
+
+
+def upgrade() -> None:
+    for name, table, column, referred in FOREIGN_KEYS:
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(name, table, referred, [column], ['id'], ondelete='CASCADE')
+
+    for table, column in TIMESTAMP_COLUMNS:
+        op.alter_column(
+            table, column,
+            type_=sa.DateTime(timezone=True),
+            postgresql_using=f"{column} AT TIME ZONE 'UTC'",
+            server_default=sa.text('now()')
+        )
+
+    for table, column, _, new_type in COLUMN_TYPES:
+        op.alter_column(
+            table, column,
+            type_=new_type,
+            postgresql_using=f"{column}::{new_type.compile(dialect=op.get_context().dialect)}"
+        )
+
+    op.create_index('ix_projects_user_created', 'projects', ['user_id', sa.text('created_at DESC')], unique=False)
+    op.create_index('ix_scans_project_executed', 'scans', ['project_id', sa.text('executed_at DESC')], unique=False)
+    op.create_index('ix_scan_points_scan_id', 'scan_points', ['scan_id'], unique=False)
+
+    op.create_table('ai_analysis_cache',
+    sa.Column('key', sa.String(length=32), nullable=False),
+    sa.Column('analysis', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('ai_analysis_cache')
+
+    op.drop_index('ix_scan_points_scan_id', table_name='scan_points')
+    op.drop_index('ix_scans_project_executed', table_name='scans')
+    op.drop_index('ix_projects_user_created', table_name='projects')
+
+    for table, column, old_type, _ in COLUMN_TYPES:
+        op.alter_column(
+            table, column,
+            type_=old_type,
+            postgresql_using=f"{column}::{old_type.compile(dialect=op.get_context().dialect)}"
+        )
+
+    for table, column in TIMESTAMP_COLUMNS:
+        op.alter_column(
+            table, column,
+            type_=sa.DateTime(),
+            postgresql_using=f"{column} AT TIME ZONE 'UTC'",
+            server_default=None
+        )
+
+    for name, table, column, referred in FOREIGN_KEYS:
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(name, table, referred, [column], ['id'])
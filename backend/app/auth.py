@@ -3,16 +3,18 @@ GBP Audit Bot - Authentication Utilities
 
 JWT-based authentication for email/password login.
 """
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 from uuid import UUID
 
+from cachetools import TTLCache
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, bindparam, lambda_stmt
 
 from app.config import get_settings
 from app.database import get_db
@@ -22,11 +24,38 @@ from app.models.models import User
 settings = get_settings()
 
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.bcrypt_rounds
+)
 
 # JWT Bearer scheme
 security = HTTPBearer()
 
+# Precompiled per-request user lookup (cached by lambda code location)
+_user_by_id = lambda_stmt(lambda: select(User).where(User.id == bindparam("user_id")))
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Read-only copy of a user row, safe to share across requests."""
+    id: UUID
+    email: str
+    name: str
+    credits_balance: int
+    created_at: datetime
+
+
+# Short-lived user snapshots for read-only endpoints, keyed by user id.
+# Entries are dropped whenever the user's credit balance changes.
+_user_cache: TTLCache = TTLCache(maxsize=10_000, ttl=30)
+
+
+def invalidate_cached_user(user_id: UUID) -> None:
+    """Drop a user's cached snapshot (call after changing their credits)."""
+    _user_cache.pop(user_id, None)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
@@ -38,6 +67,11 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+# Hash checked when the login email doesn't exist, so unknown and known
+# accounts take the same bcrypt time. Computed once at import.
+DUMMY_PASSWORD_HASH = get_password_hash("!invalid-dummy-password!")
+
+
 def create_access_token(user_id: UUID, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = {"sub": str(user_id)}
@@ -52,11 +86,8 @@ def create_access_token(user_id: UUID, expires_delta: Optional[timedelta] = None
     return encoded_jwt
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db)
-) -> User:
-    """Dependency to get the current authenticated user."""
+def _decode_user_id(credentials: HTTPAuthorizationCredentials) -> UUID:
+    """Extract the user id from a bearer token or raise 401."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -69,19 +100,57 @@ async def get_current_user(
         user_id: str = payload.get("sub")
         if user_id is None:
             raise credentials_exception
-    except JWTError:
+        return UUID(user_id)
+    except (JWTError, ValueError):
         raise credentials_exception
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """Dependency to get the current authenticated user."""
+    user_id = _decode_user_id(credentials)
     
     # Fetch user from database
-    result = await db.execute(
-        select(User).where(User.id == UUID(user_id))
-    )
+    result = await db.execute(_user_by_id, {"user_id": user_id})
     user = result.scalar_one_or_none()
     
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     
     return user
+
+
+async def get_current_user_cached(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> UserSnapshot:
+    """
+    Dependency for read-only endpoints: the current user as a snapshot.
+    
+    Served from an in-process TTL cache, so repeated calls skip the users
+    SELECT. Endpoints that modify the user must use get_current_user.
+    """
+    user_id = _decode_user_id(credentials)
+    
+    snapshot = _user_cache.get(user_id)
+    if snapshot is None:
+        user = await get_current_user(credentials, db)
+        snapshot = UserSnapshot(
+            id=user.id,
+            email=user.email,
+            name=user.name,
+            credits_balance=user.credits_balance,
+            created_at=user.created_at,
+        )
+        _user_cache[user_id] = snapshot
+    
+    return snapshot
@@ -1,12 +1,17 @@
 """
 GBP Audit Bot - Database Connection
 """
+import asyncio
+import logging
+
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 
 from app.config import get_settings
 
 
+logger = logging.getLogger(__name__)
 settings = get_settings()
 
 # Convert postgres:// to postgresql+asyncpg:// for async support
@@ -14,7 +19,26 @@ database_url = settings.database_url
 if database_url.startswith("postgresql://"):
     database_url = database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
 
-engine = create_async_engine(database_url, echo=False)
+engine = create_async_engine(
+    database_url,
+    echo=False,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    # No per-checkout pre-ping: stale connections are handled by recycling,
+    # TCP keepalives and the background keep_pool_alive() task instead
+    pool_pre_ping=False,
+    pool_recycle=settings.db_pool_recycle,
+    # Cache compiled SQL and per-connection prepared statements so the hot
+    # user/project lookups skip re-compilation and PREPARE round-trips
+    query_cache_size=1200,
+    connect_args={
+        "statement_cache_size": settings.db_statement_cache_size,
+        "prepared_statement_cache_size": settings.db_statement_cache_size,
+        "command_timeout": settings.db_command_timeout,
+        "server_settings": {"tcp_keepalives_idle": "60"},
+    }
+)
 
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -35,3 +59,38 @@ async def get_db():
             yield session
         finally:
             await session.close()
+
+
+async def warm_pool(size: int):
+    """
+    Open `size` pooled connections at startup.
+    
+    Connections are checked out together so the pool really grows to
+    `size`, then returned, so the first requests don't pay connect cost.
+    """
+    conns = []
+    try:
+        for _ in range(size):
+            conns.append(await engine.connect())
+        await asyncio.gather(*(conn.execute(text("SELECT 1")) for conn in conns))
+    except Exception as e:
+        logger.warning(f"Database pool warm-up failed: {e}")
+    finally:
+        for conn in conns:
+            await conn.close()
+
+
+async def keep_pool_alive(interval_seconds: float):
+    """
+    Background health check for the connection pool.
+    
+    Runs a cheap SELECT 1 on a pooled connection every interval, so dead
+    connections are noticed off the request path rather than on checkout.
+    """
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        except Exception as e:
+            logger.warning(f"Database keepalive check failed: {e}")
@@ -3,15 +3,24 @@ GBP Audit Bot API - FastAPI Application
 
 Main entry point for the GBP Audit Bot backend.
 """
+import asyncio
+import contextlib
 import logging
 from contextlib import asynccontextmanager
+from typing import Any
 
-from fastapi import FastAPI
+import orjson
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.routers import auth, grid, search, projects, reports
 from app.config import get_settings
+from app.database import keep_pool_alive, warm_pool
 from app.services.scheduler import init_scheduler, shutdown_scheduler
+from app.services.pdf_report import init_pdf_pool, shutdown_pdf_pool
+from app.services.ai_analysis import init_ai_client, close_ai_client
+from app.services.http_client import init_http_client, close_http_client
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -19,16 +28,43 @@ logger = logging.getLogger(__name__)
 settings = get_settings()
 
 
+class APIResponse(ORJSONResponse):
+    """orjson-backed default response (numpy arrays, naive datetimes as UTC)."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            option=orjson.OPT_NON_STR_KEYS
+            | orjson.OPT_SERIALIZE_NUMPY
+            | orjson.OPT_NAIVE_UTC,
+        )
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager for startup/shutdown events."""
     # Startup
     logger.info("Starting GBP Audit Bot API...")
     init_scheduler()
+    init_pdf_pool(settings.pdf_render_processes)
+    init_ai_client()
+    init_http_client()
+    await warm_pool(settings.db_pool_size)
+    keepalive_task = asyncio.create_task(
+        keep_pool_alive(settings.db_keepalive_interval_seconds)
+    )
     yield
     # Shutdown
     logger.info("Shutting down GBP Audit Bot API...")
+    # Wait for the cancellation, so shutdown doesn't race a keepalive
+    # check and the task isn't left pending
+    keepalive_task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await keepalive_task
     shutdown_scheduler()
+    shutdown_pdf_pool()
+    await close_ai_client()
+    await close_http_client()
 
 
 app = FastAPI(
@@ -53,6 +89,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=APIResponse,
     lifespan=lifespan
 )
 
@@ -76,14 +113,18 @@ app.include_router(search.router, prefix="/api")
 app.include_router(reports.router, prefix="/api")
 
 
+# Static body for the uptime probe, serialized once at import
+_ROOT_BODY = orjson.dumps({
+    "status": "healthy",
+    "service": "GBP Audit Bot API",
+    "version": "1.0.0"
+})
+
+
 @app.get("/")
 async def root():
     """Health check endpoint."""
-    return {
-        "status": "healthy",
-        "service": "GBP Audit Bot API",
-        "version": "1.0.0"
-    }
+    return Response(content=_ROOT_BODY, media_type="application/json")
 
 
 @app.get("/api/health")
@@ -99,3 +140,21 @@ async def health_check():
         "scheduler": "running" if scheduler and scheduler.running else "stopped"
     }
 
+
+if __name__ == "__main__":
+    import uvicorn
+    
+    try:
+        import uvloop  # noqa: F401  (not available on Windows)
+        loop = "uvloop"
+    except ImportError:
+        loop = "asyncio"
+    
+    uvicorn.run(
+        "app.main:app",
+        host=settings.server_host,
+        port=settings.server_port,
+        workers=settings.server_workers,
+        loop=loop,
+        http="httptools",
+    )
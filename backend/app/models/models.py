@@ -6,6 +6,7 @@ Database schema for the GBP Audit Bot system:
 - Projects: Client businesses being monitored
 - Scans: Search history with grid parameters
 - ScanPoints: Individual grid point results
+- AIAnalysisCache: Generated AI reports by prompt-input hash
 """
 import uuid
 from datetime import datetime
@@ -13,12 +14,14 @@ from decimal import Decimal
 from typing import Optional, List
 
 from sqlalchemy import (
-    String, Integer, DateTime, Numeric, ForeignKey, JSON, Text, Boolean
+    String, Integer, SmallInteger, Float, DateTime, Numeric, ForeignKey, JSON, Text, Boolean, Index, desc, func
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.dialects.postgresql import UUID
 
 from app.database import Base
+from app.rank_colors import get_rank_color
 
 
 class User(Base):
@@ -38,10 +41,14 @@ class User(Base):
     hashed_password: Mapped[str] = mapped_column(String(255), nullable=False)
     credits_balance: Mapped[int] = mapped_column(Integer, default=100)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
     
     # Relationships
-    projects: Mapped[List["Project"]] = relationship(back_populates="user", cascade="all, delete-orphan")
+    projects: Mapped[List["Project"]] = relationship(
+        back_populates="user", cascade="all, delete-orphan", passive_deletes=True
+    )
 
 
 class Project(Base):
@@ -50,13 +57,17 @@ class Project(Base):
     Each project has a target keyword and business to track.
     """
     __tablename__ = "projects"
+    __table_args__ = (
+        # Every projects endpoint filters by owner; listing also sorts by newest
+        Index("ix_projects_user_created", "user_id", desc("created_at")),
+    )
     
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), 
         primary_key=True, 
         default=uuid.uuid4
     )
-    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"), nullable=False)
+    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     
     # Business info
     business_name: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -64,26 +75,33 @@ class Project(Base):
     place_id: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     
     # Center coordinates
-    central_lat: Mapped[Decimal] = mapped_column(Numeric(10, 8), nullable=False)
-    central_lng: Mapped[Decimal] = mapped_column(Numeric(11, 8), nullable=False)
+    central_lat: Mapped[float] = mapped_column(Float(precision=53), nullable=False)
+    central_lng: Mapped[float] = mapped_column(Float(precision=53), nullable=False)
     
     # Default grid settings
     default_radius_km: Mapped[Decimal] = mapped_column(Numeric(5, 2), default=5.0)
-    default_grid_size: Mapped[int] = mapped_column(Integer, default=5)
+    default_grid_size: Mapped[int] = mapped_column(SmallInteger, default=5)
     
     # Actions tracking for AI reports (as per esqueleto.md)
-    weekly_actions: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # Team actions for AI context
+    # Deferred: free-form text that can grow large; load with undefer() where needed
+    weekly_actions: Mapped[Optional[str]] = mapped_column(Text, nullable=True, deferred=True)  # Team actions for AI context
     
     # WhatsApp integration
     whatsapp_group_id: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)  # JID: 123456789@g.us
     whatsapp_enabled: Mapped[bool] = mapped_column(Boolean, default=False)
     
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
-    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
     
     # Relationships
     user: Mapped["User"] = relationship(back_populates="projects")
-    scans: Mapped[List["Scan"]] = relationship(back_populates="project", cascade="all, delete-orphan")
+    scans: Mapped[List["Scan"]] = relationship(
+        back_populates="project", cascade="all, delete-orphan", passive_deletes=True
+    )
 
 
 class Scan(Base):
@@ -92,34 +110,47 @@ class Scan(Base):
     Stores the grid parameters and aggregate metrics like average rank.
     """
     __tablename__ = "scans"
+    __table_args__ = (
+        # History/comparison queries fetch a project's latest scans
+        Index("ix_scans_project_executed", "project_id", desc("executed_at")),
+    )
     
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), 
         primary_key=True, 
         default=uuid.uuid4
     )
-    project_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("projects.id"), nullable=False)
+    project_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
     
     # Search parameters
     keyword: Mapped[str] = mapped_column(String(255), nullable=False)
-    grid_size: Mapped[int] = mapped_column(Integer, nullable=False)  # 3, 5, or 7
+    grid_size: Mapped[int] = mapped_column(SmallInteger, nullable=False)  # 3, 5, or 7
     radius_km: Mapped[Decimal] = mapped_column(Numeric(5, 2), nullable=False)
     
     # Metrics (calculated after scan completes) - matching esqueleto.md
     credits_used: Mapped[int] = mapped_column(Integer, nullable=False)
     average_rank: Mapped[Optional[Decimal]] = mapped_column(Numeric(5, 2), nullable=True)  # ARP
-    top3_count: Mapped[int] = mapped_column(Integer, default=0)  # Count of positions in top 3
-    top10_count: Mapped[int] = mapped_column(Integer, default=0)  # Count of positions in top 10
+    top3_count: Mapped[int] = mapped_column(SmallInteger, default=0)  # Count of positions in top 3
+    top10_count: Mapped[int] = mapped_column(SmallInteger, default=0)  # Count of positions in top 10
     visibility_score: Mapped[Optional[Decimal]] = mapped_column(Numeric(5, 2), nullable=True)
     
     # Status
     status: Mapped[str] = mapped_column(String(50), default="pending")  # pending, running, completed, failed
     
-    executed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    executed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
     
     # Relationships
     project: Mapped["Project"] = relationship(back_populates="scans")
-    points: Mapped[List["ScanPoint"]] = relationship(back_populates="scan", cascade="all, delete-orphan")
+    points: Mapped[List["ScanPoint"]] = relationship(
+        back_populates="scan", cascade="all, delete-orphan", passive_deletes=True
+    )
+    
+    @hybrid_property
+    def total_points(self) -> int:
+        """Number of grid points (grid_size squared)."""
+        return self.grid_size * self.grid_size
 
 
 class ScanPoint(Base):
@@ -128,24 +159,27 @@ class ScanPoint(Base):
     Each point stores its coordinates and the rank found at that location.
     """
     __tablename__ = "scan_points"
+    __table_args__ = (
+        Index("ix_scan_points_scan_id", "scan_id"),
+    )
     
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), 
         primary_key=True, 
         default=uuid.uuid4
     )
-    scan_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("scans.id"), nullable=False)
+    scan_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("scans.id", ondelete="CASCADE"), nullable=False)
     
     # Grid position (0-indexed)
-    grid_x: Mapped[int] = mapped_column(Integer, nullable=False)
-    grid_y: Mapped[int] = mapped_column(Integer, nullable=False)
+    grid_x: Mapped[int] = mapped_column(SmallInteger, nullable=False)
+    grid_y: Mapped[int] = mapped_column(SmallInteger, nullable=False)
     
     # Coordinates
-    latitude: Mapped[Decimal] = mapped_column(Numeric(10, 8), nullable=False)
-    longitude: Mapped[Decimal] = mapped_column(Numeric(11, 8), nullable=False)
+    latitude: Mapped[float] = mapped_column(Float(precision=53), nullable=False)
+    longitude: Mapped[float] = mapped_column(Float(precision=53), nullable=False)
     
     # Results
-    rank_position: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # NULL if not found in top 20
+    rank_position: Mapped[Optional[int]] = mapped_column(SmallInteger, nullable=True)  # NULL if not found in top 20
     serp_data: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)  # Raw API response
     
     # Relationships
@@ -154,10 +188,18 @@ class ScanPoint(Base):
     @property
     def status_color(self) -> str:
         """Get color based on rank position."""
-        if self.rank_position is None:
-            return "red"
-        if self.rank_position <= 3:
-            return "green"
-        if self.rank_position <= 10:
-            return "yellow"
-        return "red"
+        return get_rank_color(self.rank_position)
+
+
+class AIAnalysisCache(Base):
+    """
+    Generated AI analyses keyed by a hash of their prompt inputs.
+    Lets repeat requests with identical stats skip OpenAI, across restarts.
+    """
+    __tablename__ = "ai_analysis_cache"
+    
+    key: Mapped[str] = mapped_column(String(32), primary_key=True)  # blake2b hex digest
+    analysis: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
@@ -0,0 +1,34 @@
+"""
+GBP Audit Bot - Rank Colors
+
+Display color for a rank position. Dependency-free, so the models layer
+can use it without importing the geogrid service (NumPy/Numba).
+"""
+
+
+# SERP searches request the top 20 results, so found ranks are 1-20
+MAX_TRACKED_RANK = 20
+
+# Colors indexed by rank: 1-3 green, 4-10 yellow, 11-20 red (index 0 unused)
+RANK_COLORS = ("red",) + ("green",) * 3 + ("yellow",) * 7 + ("red",) * 10
+NOT_FOUND_COLOR = "red"
+
+
+def get_rank_color(rank: int | None) -> str:
+    """
+    Get the display color for a rank position.
+
+    Color coding:
+    - Green: Positions 1-3 (Local Pack / Dominance)
+    - Yellow: Positions 4-10 (Visible but outside Local Pack)
+    - Red: Positions 11+ or not found (Invisible to most users)
+
+    Args:
+        rank: Rank position (1-20) or None if not found
+
+    Returns:
+        Color name: 'green', 'yellow', or 'red'
+    """
+    if rank is not None and 0 < rank <= MAX_TRACKED_RANK:
+        return RANK_COLORS[rank]
+    return NOT_FOUND_COLOR
@@ -3,18 +3,29 @@ GBP Audit Bot - Authentication Router
 
 Endpoints for user registration and login.
 """
+import asyncio
+
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, bindparam, lambda_stmt
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from app.database import get_db
 from app.models.models import User
 from app.schemas import UserCreate, UserLogin, UserResponse, Token
-from app.auth import get_password_hash, verify_password, create_access_token
+from app.auth import (
+    get_password_hash,
+    verify_password,
+    create_access_token,
+    get_current_user,
+    DUMMY_PASSWORD_HASH
+)
 
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+_user_by_email = lambda_stmt(lambda: select(User).where(User.email == bindparam("email")))
+
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
@@ -23,27 +34,30 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     
     New users start with 100 credits.
     """
-    # Check if email already exists
+    # bcrypt is CPU-bound; hash in a worker thread to keep the event loop free
+    hashed_password = await asyncio.to_thread(get_password_hash, user_data.password)
+    
+    # Single round-trip: insert unless the email is taken (no check-then-insert race)
     result = await db.execute(
-        select(User).where(User.email == user_data.email)
+        pg_insert(User)
+        .values(
+            email=user_data.email,
+            name=user_data.name,
+            hashed_password=hashed_password,
+            credits_balance=100  # Starting credits
+        )
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User)
     )
-    if result.scalar_one_or_none():
+    user = result.scalar_one_or_none()
+    
+    if user is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    # Create new user
-    user = User(
-        email=user_data.email,
-        name=user_data.name,
-        hashed_password=get_password_hash(user_data.password),
-        credits_balance=100  # Starting credits
-    )
-    
-    db.add(user)
     await db.commit()
-    await db.refresh(user)
     
     return user
 
@@ -54,12 +68,16 @@ async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
     Authenticate user and return JWT token.
     """
     # Find user by email
-    result = await db.execute(
-        select(User).where(User.email == credentials.email)
-    )
+    result = await db.execute(_user_by_email, {"email": credentials.email})
     user = result.scalar_one_or_none()
     
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    # Always run bcrypt so response time doesn't reveal whether the email exists
+    hashed_password = user.hashed_password if user else DUMMY_PASSWORD_HASH
+    password_ok = await asyncio.to_thread(
+        verify_password, credentials.password, hashed_password
+    )
+    
+    if not user or not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -80,8 +98,7 @@ async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(__import__('app.auth', fromlist=['get_current_user']).get_current_user)
+    current_user: User = Depends(get_current_user)
 ):
     """
     Get current authenticated user info.
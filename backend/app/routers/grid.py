@@ -5,8 +5,7 @@ Endpoints for grid generation and credit estimation.
 """
 from fastapi import APIRouter, Depends
 
-from app.auth import get_current_user
-from app.models.models import User
+from app.auth import get_current_user_cached, UserSnapshot
 from app.schemas import (
     GridGenerateRequest, 
     GridGenerateResponse, 
@@ -23,7 +22,7 @@ router = APIRouter(prefix="/grid", tags=["Grid"])
 @router.post("/generate", response_model=GridGenerateResponse)
 async def generate_grid(
     request: GridGenerateRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user_cached)
 ):
     """
     Generate a coordinate grid for visualization.
@@ -38,7 +37,9 @@ async def generate_grid(
         grid_size=request.grid_size
     )
     
-    return GridGenerateResponse(
+    # Points are computed server-side, so skip construction-time
+    # validation; the response_model check still runs once
+    return GridGenerateResponse.model_construct(
         points=[
             GridPointResponse(
                 x=p.x,
@@ -57,7 +58,7 @@ async def generate_grid(
 @router.post("/estimate", response_model=CreditEstimateResponse)
 async def estimate_search_credits(
     request: CreditEstimateRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user_cached)
 ):
     """
     Estimate credits required for a grid search.
@@ -8,16 +8,27 @@ from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, delete, bindparam, lambda_stmt
+from sqlalchemy.orm import undefer
 
 from app.database import get_db
 from app.auth import get_current_user
 from app.models.models import User, Project
-from app.schemas import ProjectCreate, ProjectResponse, ProjectUpdate
+from app.schemas import ProjectCreate, ProjectResponse, ProjectUpdate, from_orm_fast
 
 
 router = APIRouter(prefix="/projects", tags=["Projects"])
 
+# Single-project reads return weekly_actions, so undefer it here
+_project_by_owner = lambda_stmt(
+    lambda: select(Project)
+    .options(undefer(Project.weekly_actions))
+    .where(
+        Project.id == bindparam("project_id"),
+        Project.user_id == bindparam("user_id")
+    )
+)
+
 
 @router.post("/", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
 async def create_project(
@@ -36,12 +47,15 @@ async def create_project(
         central_lng=project_data.central_lng,
         place_id=project_data.place_id,
         default_radius_km=project_data.default_radius_km,
-        default_grid_size=project_data.default_grid_size
+        default_grid_size=project_data.default_grid_size,
+        weekly_actions=None
     )
     
     db.add(project)
     await db.commit()
-    await db.refresh(project)
+    # Only server-generated columns need reloading; a full refresh would
+    # expire the deferred weekly_actions again
+    await db.refresh(project, ["created_at"])
     
     return project
 
@@ -53,14 +67,27 @@ async def list_projects(
 ):
     """
     List all projects for the current user.
+    
+    Selects only the columns exposed by ProjectResponse as plain rows,
+    skipping ORM hydration of full Project instances. weekly_actions is
+    left out; fetch a single project to read it.
     """
     result = await db.execute(
-        select(Project)
+        select(
+            Project.id,
+            Project.business_name,
+            Project.target_keyword,
+            Project.central_lat,
+            Project.central_lng,
+            Project.place_id,
+            Project.default_radius_km,
+            Project.default_grid_size,
+            Project.created_at
+        )
         .where(Project.user_id == current_user.id)
         .order_by(Project.created_at.desc())
     )
-    projects = result.scalars().all()
-    return projects
+    return [from_orm_fast(ProjectResponse, row) for row in result.mappings()]
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
@@ -73,10 +100,7 @@ async def get_project(
     Get a specific project by ID.
     """
     result = await db.execute(
-        select(Project).where(
-            Project.id == project_id,
-            Project.user_id == current_user.id
-        )
+        _project_by_owner, {"project_id": project_id, "user_id": current_user.id}
     )
     project = result.scalar_one_or_none()
     
@@ -101,12 +125,22 @@ async def update_project(
     
     Use this to update weekly_actions for AI reports.
     """
-    result = await db.execute(
-        select(Project).where(
-            Project.id == project_id,
-            Project.user_id == current_user.id
+    # Only fields that were provided (non-null) are updated
+    values = project_data.model_dump(exclude_none=True)
+    
+    if values:
+        # Single UPDATE ... RETURNING instead of load-then-flush
+        result = await db.execute(
+            update(Project)
+            .where(Project.id == project_id, Project.user_id == current_user.id)
+            .values(**values)
+            .returning(Project)
+            .options(undefer(Project.weekly_actions))
+        )
+    else:
+        result = await db.execute(
+            _project_by_owner, {"project_id": project_id, "user_id": current_user.id}
         )
-    )
     project = result.scalar_one_or_none()
     
     if not project:
@@ -115,16 +149,7 @@ async def update_project(
             detail="Project not found"
         )
     
-    # Update fields if provided
-    if project_data.business_name is not None:
-        project.business_name = project_data.business_name
-    if project_data.target_keyword is not None:
-        project.target_keyword = project_data.target_keyword
-    if project_data.weekly_actions is not None:
-        project.weekly_actions = project_data.weekly_actions
-    
     await db.commit()
-    await db.refresh(project)
     
     return project
 
@@ -137,20 +162,21 @@ async def delete_project(
 ):
     """
     Delete a project and all its scans.
+    
+    Scans and scan points are removed by the database's ON DELETE CASCADE,
+    so this is a single DELETE statement.
     """
     result = await db.execute(
-        select(Project).where(
+        delete(Project).where(
             Project.id == project_id,
             Project.user_id == current_user.id
         )
     )
-    project = result.scalar_one_or_none()
     
-    if not project:
+    if result.rowcount == 0:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found"
         )
     
-    await db.delete(project)
     await db.commit()
@@ -3,23 +3,28 @@ GBP Audit Bot - Reports Router
 
 Endpoints for generating reports, comparisons, and sending notifications.
 """
+import asyncio
 import base64
+import hashlib
 from datetime import datetime, timedelta
 from uuid import UUID
-from typing import Optional
+from typing import Optional, List, AsyncIterator, BinaryIO, NamedTuple
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import Response
+from cachetools import LRUCache
+from fastapi import APIRouter, Depends, File, Form, Header, HTTPException, UploadFile, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from pydantic import BaseModel
+from sqlalchemy import select, or_, and_, bindparam, lambda_stmt
+from sqlalchemy.orm import contains_eager
+from pydantic import BaseModel, ValidationError
 
 from app.database import get_db
-from app.auth import get_current_user
+from app.auth import get_current_user, get_current_user_cached, UserSnapshot
 from app.models.models import User, Project, Scan, ScanPoint
-from app.services.geogrid import calculate_scan_stats, get_rank_color
+from app.services.geogrid import calculate_scan_stats, get_rank_colors
 from app.services.heatmap import MapPoint, generate_heatmap_image
-from app.services.pdf_report import ReportData, generate_pdf_report
+from app.services.pdf_report import ReportData, render_pdf_report
 from app.services.ai_analysis import get_ai_analysis, WeeklyStats
 from app.services.whatsapp import (
     format_weekly_report_message,
@@ -83,6 +88,135 @@ class WhatsAppReportRequest(BaseModel):
     dashboard_url: Optional[str] = None
 
 
+# ============= Helpers =============
+
+async def _ensure_project_owned(db: AsyncSession, project_id: UUID, user_id: UUID) -> None:
+    """Raise 404 if the project doesn't exist or belongs to another user."""
+    result = await db.execute(
+        select(Project.id).where(
+            Project.id == project_id,
+            Project.user_id == user_id
+        )
+    )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+
+async def _fetch_latest_scans_with_project(
+    db: AsyncSession,
+    project_id: UUID,
+    user_id: UUID,
+    n: int = 2,
+    scan_id: Optional[UUID] = None
+) -> tuple[Project, List[Scan]]:
+    """
+    Latest n completed scans of a project, newest first, with the project.
+    
+    One JOIN query; the join on Project.user_id doubles as the ownership
+    check. With scan_id, the list starts at that scan (any status) followed
+    by the completed scans before it. Raises 404 when nothing matches.
+    """
+    if scan_id:
+        target_executed_at = (
+            select(Scan.executed_at)
+            .where(Scan.id == scan_id)
+            .scalar_subquery()
+        )
+        scan_filter = or_(
+            Scan.id == scan_id,
+            and_(Scan.status == "completed", Scan.executed_at < target_executed_at)
+        )
+    else:
+        scan_filter = Scan.status == "completed"
+    
+    result = await db.execute(
+        select(Scan)
+        .join(Scan.project)
+        .options(contains_eager(Scan.project).undefer(Project.weekly_actions))
+        .where(
+            Project.id == project_id,
+            Project.user_id == user_id,
+            scan_filter
+        )
+        .order_by(Scan.executed_at.desc())
+        .limit(n)
+    )
+    scans = list(result.scalars().all())
+    
+    if not scans or (scan_id and scans[0].id != scan_id):
+        await _ensure_project_owned(db, project_id, user_id)
+        raise HTTPException(
+            status_code=404,
+            detail="Scan not found" if scan_id else "No completed scans found"
+        )
+    
+    return scans[0].project, scans
+
+
+def _map_point_rows(scan_id):
+    """Plain (lat, lng, rank) projection of a scan's points, no ORM hydration."""
+    return select(
+        ScanPoint.latitude,
+        ScanPoint.longitude,
+        ScanPoint.rank_position
+    ).where(ScanPoint.scan_id == scan_id)
+
+
+def _build_map_points(rows) -> List[MapPoint]:
+    """Build heatmap markers from (lat, lng, rank) rows."""
+    colors = get_rank_colors([rank for _, _, rank in rows])
+    return [
+        MapPoint(lat=lat, lng=lng, rank=rank, color=color)
+        for (lat, lng, rank), color in zip(rows, colors)
+    ]
+
+
+class _CachedHeatmap(NamedTuple):
+    png: bytes
+    etag: str
+
+
+# Rendered heatmaps keyed by scan id. Points never change once a scan is
+# saved, so entries don't need invalidation; size is bounded by PNG bytes.
+# Deletes aren't seen here (each worker has its own cache), so hits still
+# check the scan exists and is the user's via _scan_owner.
+_heatmap_cache: LRUCache = LRUCache(
+    maxsize=64 * 1024 * 1024,
+    getsizeof=lambda entry: len(entry.png)
+)
+
+HEATMAP_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+# Owner of a scan (None if it doesn't exist)
+_scan_owner = lambda_stmt(
+    lambda: select(Project.user_id)
+    .join(Scan, Scan.project_id == Project.id)
+    .where(Scan.id == bindparam("scan_id"))
+)
+
+
+PDF_CHUNK_SIZE = 64 * 1024
+
+
+async def _iter_chunks(stream: BinaryIO, chunk_size: int = PDF_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Yield a binary stream in fixed-size chunks."""
+    while chunk := stream.read(chunk_size):
+        yield chunk
+
+
+async def _pdf_download(report_data: ReportData, filename: str) -> StreamingResponse:
+    """Render the report off the event loop and stream it as a download."""
+    pdf_buffer = await render_pdf_report(report_data)
+    
+    return StreamingResponse(
+        _iter_chunks(pdf_buffer),
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}"
+        }
+    )
+
+
 # ============= Endpoints =============
 
 @router.post("/comparison", response_model=WeeklyComparisonResponse)
@@ -96,34 +230,13 @@ async def get_weekly_comparison(
     
     Optionally includes AI analysis of the results.
     """
-    # Get project
-    result = await db.execute(
-        select(Project).where(
-            Project.id == request.project_id,
-            Project.user_id == current_user.id
-        )
-    )
-    project = result.scalar_one_or_none()
-    
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    
-    # Get latest 2 scans
-    result = await db.execute(
-        select(Scan)
-        .where(Scan.project_id == request.project_id, Scan.status == "completed")
-        .order_by(Scan.executed_at.desc())
-        .limit(2)
+    project, scans = await _fetch_latest_scans_with_project(
+        db, request.project_id, current_user.id
     )
-    scans = result.scalars().all()
-    
-    if not scans:
-        raise HTTPException(status_code=404, detail="No completed scans found")
-    
     current_scan = scans[0]
     prev_scan = scans[1] if len(scans) > 1 else None
     
-    total_points = current_scan.grid_size ** 2
+    total_points = current_scan.total_points
     
     # Calculate changes
     arp_change = None
@@ -143,7 +256,7 @@ async def get_weekly_comparison(
         current_stats = WeeklyStats(
             arp=float(current_scan.average_rank) if current_scan.average_rank else None,
             top3=current_scan.top3_count,
-            visibility=float(current_scan.visibility_score) if current_scan.visibility_score else 0
+            total_points=total_points
         )
         
         prev_stats = None
@@ -151,7 +264,7 @@ async def get_weekly_comparison(
             prev_stats = WeeklyStats(
                 arp=float(prev_scan.average_rank) if prev_scan.average_rank else None,
                 top3=prev_scan.top3_count,
-                visibility=float(prev_scan.visibility_score) if prev_scan.visibility_score else 0
+                total_points=prev_scan.total_points
             )
         
         try:
@@ -159,8 +272,10 @@ async def get_weekly_comparison(
                 business_name=project.business_name,
                 current_stats=current_stats,
                 prev_stats=prev_stats,
-                actions=project.weekly_actions
+                actions=project.weekly_actions,
+                db=db
             )
+            await db.commit()  # persist a newly cached analysis
         except Exception:
             ai_analysis = None  # Fallback handled in service
     
@@ -194,77 +309,29 @@ async def generate_pdf(
     
     Returns the PDF file as a download.
     """
-    # Get project
-    result = await db.execute(
-        select(Project).where(
-            Project.id == request.project_id,
-            Project.user_id == current_user.id
-        )
+    # Report scan (specific or latest) plus the previous completed scan
+    project, scans = await _fetch_latest_scans_with_project(
+        db, request.project_id, current_user.id, scan_id=request.scan_id
     )
-    project = result.scalar_one_or_none()
-    
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    
-    # Get scan (specific or latest)
-    if request.scan_id:
-        result = await db.execute(
-            select(Scan).where(Scan.id == request.scan_id)
-        )
-    else:
-        result = await db.execute(
-            select(Scan)
-            .where(Scan.project_id == request.project_id, Scan.status == "completed")
-            .order_by(Scan.executed_at.desc())
-            .limit(1)
-        )
-    
-    scan = result.scalar_one_or_none()
-    if not scan:
-        raise HTTPException(status_code=404, detail="Scan not found")
-    
-    # Get scan points for heatmap
-    result = await db.execute(
-        select(ScanPoint).where(ScanPoint.scan_id == scan.id)
-    )
-    points = result.scalars().all()
-    
-    # Get previous scan for comparison
-    result = await db.execute(
-        select(Scan)
-        .where(
-            Scan.project_id == request.project_id,
-            Scan.status == "completed",
-            Scan.executed_at < scan.executed_at
-        )
-        .order_by(Scan.executed_at.desc())
-        .limit(1)
-    )
-    prev_scan = result.scalar_one_or_none()
+    scan = scans[0]
+    prev_scan = scans[1] if len(scans) > 1 else None
     
-    total_points = scan.grid_size ** 2
+    # Scan points are only needed for the heatmap
+    rows = []
+    if request.include_heatmap:
+        result = await db.execute(_map_point_rows(scan.id))
+        rows = result.all()
     
-    # Generate heatmap image
-    heatmap_bytes = None
-    if request.include_heatmap and points:
-        map_points = [
-            MapPoint(
-                lat=float(p.latitude),
-                lng=float(p.longitude),
-                rank=p.rank_position,
-                color=get_rank_color(p.rank_position)
-            )
-            for p in points
-        ]
-        heatmap_bytes = generate_heatmap_image(map_points)
+    total_points = scan.total_points
     
-    # Get AI analysis
-    ai_analysis = None
+    # Start the AI analysis (network-bound) first so it runs while the
+    # heatmap (CPU-bound) renders in a worker thread
+    ai_task = None
     if request.include_ai_analysis:
         current_stats = WeeklyStats(
             arp=float(scan.average_rank) if scan.average_rank else None,
             top3=scan.top3_count,
-            visibility=float(scan.visibility_score) if scan.visibility_score else 0
+            total_points=total_points
         )
         
         prev_stats = None
@@ -272,16 +339,32 @@ async def generate_pdf(
             prev_stats = WeeklyStats(
                 arp=float(prev_scan.average_rank) if prev_scan.average_rank else None,
                 top3=prev_scan.top3_count,
-                visibility=float(prev_scan.visibility_score) if prev_scan.visibility_score else 0
+                total_points=prev_scan.total_points
             )
         
+        ai_task = asyncio.create_task(get_ai_analysis(
+            business_name=project.business_name,
+            current_stats=current_stats,
+            prev_stats=prev_stats,
+            actions=project.weekly_actions,
+            db=db
+        ))
+    
+    # Generate heatmap image
+    heatmap_bytes = None
+    if rows:
+        map_points = _build_map_points(rows)
         try:
-            ai_analysis = await get_ai_analysis(
-                business_name=project.business_name,
-                current_stats=current_stats,
-                prev_stats=prev_stats,
-                actions=project.weekly_actions
-            )
+            heatmap_bytes = await asyncio.to_thread(generate_heatmap_image, map_points)
+        except Exception:
+            pass  # Report is still generated without the map
+    
+    # Get AI analysis
+    ai_analysis = None
+    if ai_task:
+        try:
+            ai_analysis = await ai_task
+            await db.commit()  # persist a newly cached analysis
         except Exception:
             pass
     
@@ -304,77 +387,80 @@ async def generate_pdf(
         heatmap_image=heatmap_bytes
     )
     
-    # Generate PDF
-    pdf_bytes = generate_pdf_report(report_data)
-    
-    # Return as downloadable file
+    # Generate PDF and return as downloadable file
     filename = f"gbp_report_{project.business_name.replace(' ', '_')}_{scan.executed_at.strftime('%Y%m%d')}.pdf"
     
-    return Response(
-        content=pdf_bytes,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f"attachment; filename={filename}"
-        }
-    )
+    return await _pdf_download(report_data, filename)
 
 
 @router.get("/heatmap/{scan_id}")
 async def get_heatmap_image(
     scan_id: UUID,
+    if_none_match: Optional[str] = Header(default=None),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user_cached)
 ):
     """
     Generate and return heatmap image for a scan.
     
-    Returns PNG image.
+    Returns PNG image. Renders are cached per scan and served with an
+    ETag, so conditional requests get 304 Not Modified.
     """
-    # Get scan with project for ownership check
-    result = await db.execute(
-        select(Scan).where(Scan.id == scan_id)
-    )
-    scan = result.scalar_one_or_none()
+    cached = _heatmap_cache.get(scan_id)
+    if cached is None:
+        cached = await _render_heatmap(db, scan_id, current_user.id)
+    else:
+        # One indexed lookup instead of the points query and render
+        result = await db.execute(_scan_owner, {"scan_id": scan_id})
+        _check_scan_owner(scan_id, result.scalar_one_or_none(), current_user.id)
     
-    if not scan:
-        raise HTTPException(status_code=404, detail="Scan not found")
+    headers = {"ETag": cached.etag, "Cache-Control": HEATMAP_CACHE_CONTROL}
+    if if_none_match == cached.etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
     
-    # Verify ownership
-    result = await db.execute(
-        select(Project).where(
-            Project.id == scan.project_id,
-            Project.user_id == current_user.id
-        )
+    return Response(
+        content=cached.png,
+        media_type="image/png",
+        headers=headers
     )
-    if not result.scalar_one_or_none():
+
+
+def _check_scan_owner(scan_id: UUID, owner_id: Optional[UUID], user_id: UUID):
+    """Raise 404/403 unless the scan exists and belongs to user_id."""
+    if owner_id is None:
+        _heatmap_cache.pop(scan_id, None)  # deleted since it was cached
+        raise HTTPException(status_code=404, detail="Scan not found")
+    if owner_id != user_id:
         raise HTTPException(status_code=403, detail="Access denied")
-    
-    # Get scan points
+
+
+async def _render_heatmap(db: AsyncSession, scan_id: UUID, user_id: UUID) -> _CachedHeatmap:
+    """Load a scan's points, render its heatmap and cache the PNG."""
+    # Point rows for the scan; the joins on Project.user_id verify ownership
     result = await db.execute(
-        select(ScanPoint).where(ScanPoint.scan_id == scan_id)
+        _map_point_rows(scan_id)
+        .join(ScanPoint.scan)
+        .join(Scan.project)
+        .where(Project.user_id == user_id)
     )
-    points = result.scalars().all()
+    rows = result.all()
     
-    if not points:
+    if not rows:
+        # Work out which error applies only on the failure path
+        result = await db.execute(_scan_owner, {"scan_id": scan_id})
+        _check_scan_owner(scan_id, result.scalar_one_or_none(), user_id)
         raise HTTPException(status_code=404, detail="No points found for scan")
     
-    # Generate heatmap
-    map_points = [
-        MapPoint(
-            lat=float(p.latitude),
-            lng=float(p.longitude),
-            rank=p.rank_position,
-            color=get_rank_color(p.rank_position)
-        )
-        for p in points
-    ]
-    
-    heatmap_bytes = generate_heatmap_image(map_points)
+    # Generate heatmap off the event loop
+    map_points = _build_map_points(rows)
+    png = await asyncio.to_thread(generate_heatmap_image, map_points)
     
-    return Response(
-        content=heatmap_bytes,
-        media_type="image/png"
+    entry = _CachedHeatmap(
+        png=png,
+        etag=f'"{hashlib.blake2b(png, digest_size=16).hexdigest()}"'
     )
+    _heatmap_cache[scan_id] = entry
+    return entry
 
 
 class PDFGenerateDirectRequest(BaseModel):
@@ -405,7 +491,7 @@ class PDFGenerateDirectRequest(BaseModel):
     heatmap_base64: Optional[str] = None
 
 
-@router.post("/pdf/generate")
+@router.post("/pdf/generate", deprecated=True)
 async def generate_pdf_direct(request: PDFGenerateDirectRequest):
     """
     Generate a PDF report from direct data (no auth required).
@@ -413,14 +499,11 @@ async def generate_pdf_direct(request: PDFGenerateDirectRequest):
     This endpoint accepts scan data directly from the frontend,
     useful for client-side generated results.
     
+    Deprecated: use /pdf/generate/upload, which takes the heatmap as a
+    raw PNG upload instead of base64.
+    
     Returns the PDF file as a download.
     """
-    # Parse scan date
-    try:
-        scan_date = datetime.fromisoformat(request.scan_date.replace('Z', '+00:00'))
-    except ValueError:
-        scan_date = datetime.now()
-    
     # Decode heatmap if provided
     heatmap_bytes = None
     if request.heatmap_base64:
@@ -429,10 +512,47 @@ async def generate_pdf_direct(request: PDFGenerateDirectRequest):
             base64_data = request.heatmap_base64
             if ',' in base64_data:
                 base64_data = base64_data.split(',')[1]
-            heatmap_bytes = base64.b64decode(base64_data)
+            heatmap_bytes = await asyncio.to_thread(base64.b64decode, base64_data)
         except Exception:
             pass  # Skip heatmap if decode fails
     
+    return await _direct_pdf_download(request, heatmap_bytes)
+
+
+@router.post("/pdf/generate/upload")
+async def generate_pdf_direct_upload(
+    data: str = Form(..., description="PDFGenerateDirectRequest as JSON (heatmap_base64 is ignored)"),
+    heatmap: Optional[UploadFile] = File(default=None, description="Heatmap PNG")
+):
+    """
+    Generate a PDF report from direct data sent as multipart/form-data.
+    
+    Same as /pdf/generate, but the heatmap is uploaded as a raw PNG file,
+    avoiding base64 inflation and decoding.
+    
+    Returns the PDF file as a download.
+    """
+    try:
+        request = PDFGenerateDirectRequest.model_validate_json(data)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    
+    heatmap_bytes = await heatmap.read() if heatmap else None
+    
+    return await _direct_pdf_download(request, heatmap_bytes or None)
+
+
+async def _direct_pdf_download(
+    request: PDFGenerateDirectRequest,
+    heatmap_bytes: Optional[bytes]
+) -> StreamingResponse:
+    """Build the report for the direct PDF endpoints and stream it."""
+    # Parse scan date
+    try:
+        scan_date = datetime.fromisoformat(request.scan_date.replace('Z', '+00:00'))
+    except ValueError:
+        scan_date = datetime.now()
+    
     # Build report data
     report_data = ReportData(
         business_name=request.business_name,
@@ -450,20 +570,11 @@ async def generate_pdf_direct(request: PDFGenerateDirectRequest):
         heatmap_image=heatmap_bytes
     )
     
-    # Generate PDF
-    pdf_bytes = generate_pdf_report(report_data)
-    
-    # Return as downloadable file
+    # Generate PDF and return as downloadable file
     safe_name = request.business_name.replace(' ', '_').replace('/', '_')
     filename = f"gbp_report_{safe_name}_{scan_date.strftime('%Y%m%d')}.pdf"
     
-    return Response(
-        content=pdf_bytes,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f"attachment; filename={filename}"
-        }
-    )
+    return await _pdf_download(report_data, filename)
 
 
 @router.post("/whatsapp/send")
@@ -477,34 +588,13 @@ async def send_whatsapp_report_endpoint(
     
     Requires WhatsApp API configuration in settings.
     """
-    # Get project
-    result = await db.execute(
-        select(Project).where(
-            Project.id == request.project_id,
-            Project.user_id == current_user.id
-        )
+    project, scans = await _fetch_latest_scans_with_project(
+        db, request.project_id, current_user.id
     )
-    project = result.scalar_one_or_none()
-    
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    
-    # Get latest 2 scans
-    result = await db.execute(
-        select(Scan)
-        .where(Scan.project_id == request.project_id, Scan.status == "completed")
-        .order_by(Scan.executed_at.desc())
-        .limit(2)
-    )
-    scans = result.scalars().all()
-    
-    if not scans:
-        raise HTTPException(status_code=404, detail="No completed scans found")
-    
     current_scan = scans[0]
     prev_scan = scans[1] if len(scans) > 1 else None
     
-    total_points = current_scan.grid_size ** 2
+    total_points = current_scan.total_points
     
     # Format dates
     period_end = current_scan.executed_at.strftime("%d/%m")
@@ -4,21 +4,21 @@ GBP Audit Bot - Search Router
 Endpoints for executing grid searches and viewing results.
 """
 from uuid import UUID
-from decimal import Decimal
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, insert, update
 from sqlalchemy.orm import selectinload
 
 from app.database import get_db
-from app.auth import get_current_user
+from app.auth import get_current_user, invalidate_cached_user
 from app.models.models import User, Project, Scan, ScanPoint
 from app.schemas import (
     SearchExecuteRequest,
     ScanResponse,
     ScanSummaryResponse,
-    ScanPointResponse
+    ScanPointResponse,
+    from_orm_fast
 )
 from app.services.geogrid import (
     generate_geogrid, 
@@ -45,8 +45,10 @@ async def execute_search(
     1. Generate the coordinate grid
     2. Call Scale SERP API for each point (with batching)
     3. Calculate metrics (ARP, Top3, Visibility)
-    4. Deduct credits from user balance
-    5. Save results to database
+    4. Save results to database
+    
+    Credits are reserved before the SERP calls and refunded if the
+    search fails.
     """
     # Get project
     result = await db.execute(
@@ -68,33 +70,57 @@ async def execute_search(
     radius_km = request.radius_km or float(project.default_radius_km)
     grid_size = request.grid_size or project.default_grid_size
     
-    # Check credits
     credits_required = estimate_credits(grid_size)
-    if current_user.credits_balance < credits_required:
-        raise HTTPException(
-            status_code=status.HTTP_402_PAYMENT_REQUIRED,
-            detail=f"Insufficient credits. Required: {credits_required}, Available: {current_user.credits_balance}"
-        )
     
     # Generate grid
     points = generate_geogrid(
-        center_lat=float(project.central_lat),
-        center_lng=float(project.central_lng),
+        center_lat=project.central_lat,
+        center_lng=project.central_lng,
         radius_km=radius_km,
         grid_size=grid_size
     )
     
+    # Reserve credits: check and debit in one conditional UPDATE, so
+    # concurrent scans can't both spend the same balance. Read before any
+    # rollback, which expires current_user.
+    user_id = current_user.id
+    available = current_user.credits_balance
+    reserved = await db.execute(
+        update(User)
+        .where(User.id == user_id, User.credits_balance >= credits_required)
+        .values(credits_balance=User.credits_balance - credits_required)
+        .returning(User.credits_balance)
+        .execution_options(synchronize_session=False)
+    )
+    if reserved.scalar_one_or_none() is None:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_402_PAYMENT_REQUIRED,
+            detail=f"Insufficient credits. Required: {credits_required}, Available: {available}"
+        )
+    
     # Create scan record (pending)
     scan = Scan(
         project_id=project.id,
         keyword=keyword,
         grid_size=grid_size,
-        radius_km=Decimal(str(radius_km)),
+        radius_km=radius_km,  # asyncpg binds floats to NUMERIC directly
         credits_used=credits_required,
         status="running"
     )
     db.add(scan)
-    await db.flush()  # Get scan ID without committing
+    # Commit the reservation and running scan up front so the pooled
+    # connection is released while the SERP calls are in flight, instead of
+    # idling in a transaction. If this process dies mid-search, the
+    # scheduler's fail_stale_scans job fails the scan and refunds it.
+    await db.commit()
+    invalidate_cached_user(user_id)
+    scan_id = scan.id
+    
+    # The final writes only apply while the scan is still running: if
+    # fail_stale_scans got there first, the scan was already failed and
+    # refunded, so it must neither complete nor be refunded again
+    still_running = (Scan.id == scan_id, Scan.status == "running")
     
     try:
         # Execute SERP search
@@ -104,40 +130,53 @@ async def execute_search(
             keyword=keyword
         )
         
-        # Save scan points
-        scan_points = []
-        for r in results:
-            point = ScanPoint(
-                scan_id=scan.id,
-                grid_x=r.grid_x,
-                grid_y=r.grid_y,
-                latitude=Decimal(str(r.latitude)),
-                longitude=Decimal(str(r.longitude)),
-                rank_position=r.rank_position,
-                serp_data=r.serp_data
-            )
-            scan_points.append(point)
-            db.add(point)
+        # Save scan points with one bulk INSERT (no ORM instances)
+        await db.execute(
+            insert(ScanPoint),
+            [
+                {
+                    "scan_id": scan_id,
+                    "grid_x": r.grid_x,
+                    "grid_y": r.grid_y,
+                    "latitude": r.latitude,
+                    "longitude": r.longitude,
+                    "rank_position": r.rank_position,
+                    "serp_data": r.serp_data
+                }
+                for r in results
+            ]
+        )
         
         # Calculate metrics
         ranks = extract_ranks_from_results(results)
         stats = calculate_scan_stats(ranks, grid_size)
         
         # Update scan with metrics
-        scan.average_rank = Decimal(str(stats.arp)) if stats.arp else None
-        scan.top3_count = stats.top3
-        scan.top10_count = stats.top10
-        scan.visibility_score = Decimal(str(stats.visibility_score))
-        scan.status = "completed"
-        
-        # Deduct credits
-        current_user.credits_balance -= credits_required
+        completed = await db.execute(
+            update(Scan)
+            .where(*still_running)
+            .values(
+                average_rank=stats.arp,
+                top3_count=stats.top3,
+                top10_count=stats.top10,
+                visibility_score=stats.visibility_score,
+                status="completed"
+            )
+            .returning(Scan.id)
+            .execution_options(synchronize_session=False)
+        )
+        if completed.scalar_one_or_none() is None:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Scan timed out and was refunded; run it again"
+            )
         
         await db.commit()
         await db.refresh(scan)
         
-        # Build response
-        return ScanResponse(
+        # Build response (trusted data, so skip construction-time validation)
+        return ScanResponse.model_construct(
             id=scan.id,
             project_id=scan.project_id,
             keyword=scan.keyword,
@@ -152,20 +191,37 @@ async def execute_search(
             executed_at=scan.executed_at,
             points=[
                 ScanPointResponse(
-                    grid_x=p.grid_x,
-                    grid_y=p.grid_y,
-                    latitude=p.latitude,
-                    longitude=p.longitude,
-                    rank_position=p.rank_position,
-                    color=get_rank_color(p.rank_position)
+                    grid_x=r.grid_x,
+                    grid_y=r.grid_y,
+                    latitude=r.latitude,
+                    longitude=r.longitude,
+                    rank_position=r.rank_position,
+                    color=get_rank_color(r.rank_position)
                 )
-                for p in scan_points
+                for r in results
             ]
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
-        scan.status = "failed"
+        await db.rollback()
+        failed = await db.execute(
+            update(Scan)
+            .where(*still_running)
+            .values(status="failed")
+            .returning(Scan.id)
+            .execution_options(synchronize_session=False)
+        )
+        if failed.scalar_one_or_none() is not None:
+            await db.execute(
+                update(User)
+                .where(User.id == user_id)
+                .values(credits_balance=User.credits_balance + credits_required)
+                .execution_options(synchronize_session=False)
+            )
         await db.commit()
+        invalidate_cached_user(user_id)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Search execution failed: {str(e)}"
@@ -184,40 +240,43 @@ async def get_search_history(
     
     Returns the most recent scans without detailed point data.
     """
-    # Verify project ownership
+    # Only the summary columns; the join on Project.user_id verifies ownership
     result = await db.execute(
-        select(Project).where(
-            Project.id == project_id,
-            Project.user_id == current_user.id
+        select(
+            Scan.id,
+            Scan.keyword,
+            Scan.grid_size,
+            Scan.average_rank,
+            Scan.top3_count,
+            Scan.visibility_score,
+            Scan.executed_at
         )
-    )
-    if not result.scalar_one_or_none():
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
+        .join(Scan.project)
+        .where(
+            Scan.project_id == project_id,
+            Project.user_id == current_user.id,
+            Scan.status == "completed"
         )
-    
-    # Get scans
-    result = await db.execute(
-        select(Scan)
-        .where(Scan.project_id == project_id, Scan.status == "completed")
         .order_by(Scan.executed_at.desc())
         .limit(limit)
     )
-    scans = result.scalars().all()
+    rows = result.all()
     
-    return [
-        ScanSummaryResponse(
-            id=s.id,
-            keyword=s.keyword,
-            grid_size=s.grid_size,
-            average_rank=s.average_rank,
-            top3_count=s.top3_count,
-            visibility_score=s.visibility_score,
-            executed_at=s.executed_at
+    if not rows:
+        # Empty history is valid; only check the project when nothing matched
+        result = await db.execute(
+            select(Project.id).where(
+                Project.id == project_id,
+                Project.user_id == current_user.id
+            )
         )
-        for s in scans
-    ]
+        if result.scalar_one_or_none() is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Project not found"
+            )
+    
+    return [from_orm_fast(ScanSummaryResponse, row) for row in rows]
 
 
 @router.get("/{scan_id}", response_model=ScanResponse)
@@ -229,27 +288,29 @@ async def get_scan_details(
     """
     Get detailed results for a specific scan.
     """
+    # The join on Project.user_id verifies ownership in the same query
     result = await db.execute(
         select(Scan)
-        .options(selectinload(Scan.points), selectinload(Scan.project))
-        .where(Scan.id == scan_id)
+        .join(Scan.project)
+        .options(selectinload(Scan.points))
+        .where(Scan.id == scan_id, Project.user_id == current_user.id)
     )
     scan = result.scalar_one_or_none()
     
     if not scan:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Scan not found"
-        )
-    
-    # Verify ownership
-    if scan.project.user_id != current_user.id:
+        result = await db.execute(select(Scan.id).where(Scan.id == scan_id))
+        if result.scalar_one_or_none() is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Scan not found"
+            )
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied"
         )
     
-    return ScanResponse(
+    # Trusted DB data, so skip construction-time validation
+    return ScanResponse.model_construct(
         id=scan.id,
         project_id=scan.project_id,
         keyword=scan.keyword,
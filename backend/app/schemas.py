@@ -3,12 +3,42 @@ GBP Audit Bot - Pydantic Schemas for API validation
 
 Request and response models for all API endpoints.
 """
+from collections.abc import Mapping
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional, List
+from typing import Annotated, Any, Literal, Optional, List, Type, TypeVar
 from uuid import UUID
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, PlainSerializer
+from typing_extensions import TypedDict
+
+
+M = TypeVar("M", bound=BaseModel)
+
+# Supported grid dimensions, checked by pydantic-core
+GridSize = Literal[3, 5, 7]
+
+# Grid coordinates are kept at full precision and rounded to 6dp (~0.1 m)
+# only when serialized
+Coordinate = Annotated[float, PlainSerializer(lambda v: round(v, 6), return_type=float)]
+
+# Response models are read-only DTOs: built once from DB rows or service
+# results and serialized, never mutated afterwards
+RESPONSE_CONFIG = ConfigDict(from_attributes=True, frozen=True)
+
+
+def from_orm_fast(model: Type[M], obj: Any) -> M:
+    """
+    Build a response model from trusted DB data, skipping validation.
+    
+    Accepts ORM instances or result rows/mappings; fields missing from
+    obj keep their defaults. Not for user-supplied data.
+    """
+    if isinstance(obj, Mapping):
+        values = {name: obj[name] for name in model.model_fields if name in obj}
+    else:
+        values = {name: getattr(obj, name) for name in model.model_fields if hasattr(obj, name)}
+    return model.model_construct(**values)
 
 
 # ============= Auth Schemas =============
@@ -34,8 +64,7 @@ class UserResponse(BaseModel):
     credits_balance: int
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = RESPONSE_CONFIG
 
 
 class Token(BaseModel):
@@ -54,11 +83,7 @@ class ProjectCreate(BaseModel):
     central_lng: float = Field(..., ge=-180, le=180)
     place_id: Optional[str] = None
     default_radius_km: float = Field(default=5.0, gt=0, le=50)
-    default_grid_size: int = Field(default=5)
-    
-    def model_post_init(self, __context):
-        if self.default_grid_size not in [3, 5, 7]:
-            raise ValueError("Grid size must be 3, 5, or 7")
+    default_grid_size: GridSize = 5
 
 
 class ProjectResponse(BaseModel):
@@ -66,16 +91,15 @@ class ProjectResponse(BaseModel):
     id: UUID
     business_name: str
     target_keyword: str
-    central_lat: Decimal
-    central_lng: Decimal
+    central_lat: float
+    central_lng: float
     place_id: Optional[str]
     default_radius_km: Decimal
     default_grid_size: int
-    weekly_actions: Optional[str]
+    weekly_actions: Optional[str] = None  # Omitted from project listings
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = RESPONSE_CONFIG
 
 
 class ProjectUpdate(BaseModel):
@@ -92,19 +116,20 @@ class GridGenerateRequest(BaseModel):
     lat: float = Field(..., ge=-90, le=90, description="Central latitude")
     lng: float = Field(..., ge=-180, le=180, description="Central longitude")
     radius_km: float = Field(default=5.0, gt=0, le=50, description="Radius in km")
-    grid_size: int = Field(default=5, description="Grid dimension (3, 5, or 7)")
-    
-    def model_post_init(self, __context):
-        if self.grid_size not in [3, 5, 7]:
-            raise ValueError("Grid size must be 3, 5, or 7")
+    grid_size: GridSize = Field(default=5, description="Grid dimension (3, 5, or 7)")
 
 
-class GridPointResponse(BaseModel):
-    """Response schema for a single grid point."""
+class GridPointResponse(TypedDict):
+    """
+    Response schema for a single grid point.
+    
+    A TypedDict rather than a model: it is only ever returned, many per
+    response, and validating plain dicts is cheaper than building models.
+    """
     x: int
     y: int
-    latitude: float
-    longitude: float
+    latitude: Coordinate
+    longitude: Coordinate
     label: str
 
 
@@ -113,6 +138,8 @@ class GridGenerateResponse(BaseModel):
     points: List[GridPointResponse]
     total_points: int
     estimated_credits: int
+    
+    model_config = RESPONSE_CONFIG
 
 
 # ============= Search/Scan Schemas =============
@@ -122,20 +149,12 @@ class SearchExecuteRequest(BaseModel):
     project_id: UUID
     keyword: Optional[str] = None  # Uses project default if not provided
     radius_km: Optional[float] = Field(default=None, gt=0, le=50)
-    grid_size: Optional[int] = None
-    
-    def model_post_init(self, __context):
-        if self.grid_size is not None and self.grid_size not in [3, 5, 7]:
-            raise ValueError("Grid size must be 3, 5, or 7")
+    grid_size: Optional[GridSize] = None
 
 
 class CreditEstimateRequest(BaseModel):
     """Request schema for credit estimation."""
-    grid_size: int = Field(default=5)
-    
-    def model_post_init(self, __context):
-        if self.grid_size not in [3, 5, 7]:
-            raise ValueError("Grid size must be 3, 5, or 7")
+    grid_size: GridSize = 5
 
 
 class CreditEstimateResponse(BaseModel):
@@ -146,19 +165,18 @@ class CreditEstimateResponse(BaseModel):
     user_balance: int
     has_sufficient_credits: bool
     message: str
+    
+    model_config = RESPONSE_CONFIG
 
 
-class ScanPointResponse(BaseModel):
-    """Response schema for a scan point result."""
+class ScanPointResponse(TypedDict):
+    """Response schema for a scan point result (TypedDict, like GridPointResponse)."""
     grid_x: int
     grid_y: int
-    latitude: Decimal
-    longitude: Decimal
+    latitude: Coordinate
+    longitude: Coordinate
     rank_position: Optional[int]
     color: str  # green, yellow, red
-    
-    class Config:
-        from_attributes = True
 
 
 class ScanResponse(BaseModel):
@@ -177,8 +195,7 @@ class ScanResponse(BaseModel):
     executed_at: datetime
     points: List[ScanPointResponse]
     
-    class Config:
-        from_attributes = True
+    model_config = RESPONSE_CONFIG
 
 
 class ScanSummaryResponse(BaseModel):
@@ -191,8 +208,7 @@ class ScanSummaryResponse(BaseModel):
     visibility_score: Optional[Decimal]
     executed_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = RESPONSE_CONFIG
 
 
 # ============= Report Schemas =============
@@ -206,3 +222,5 @@ class WeeklyComparisonResponse(BaseModel):
     top3_change: Optional[int]
     visibility_change: Optional[float]
     ai_analysis: Optional[str]
+    
+    model_config = RESPONSE_CONFIG
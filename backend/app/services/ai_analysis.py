@@ -4,17 +4,107 @@ GBP Audit Bot - AI Analysis Service
 Generates narrative reports using OpenAI for weekly client updates.
 Based on the get_ai_analysis function from esqueleto.md.
 """
-from dataclasses import dataclass
-from typing import Optional
+import asyncio
+import hashlib
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from datetime import timedelta
+from typing import AsyncIterator, Optional
+
 import httpx
+import orjson
+from cachetools import TTLCache
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.services.http_client import HTTP2_AVAILABLE
+from app.models.models import AIAnalysisCache
 
 
+logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Bump whenever the prompt, model or parameters change, so cached
+# analyses from the old prompt stop matching
+PROMPT_VERSION = 1
+
+SYSTEM_PROMPT = """
+    Você é o Lead Growth Analyst da Locuz. Sua missão é escrever um relatório de SEO Local 
+    para WhatsApp. Seja direto, use emojis e foque em resultados. 
+    Compare os dados atuais com os da semana passada.
+    
+    Formato esperado:
+    - Máximo 300 palavras
+    - Use emojis para destacar pontos importantes
+    - Inclua: resumo de performance, comparativo, e próximos passos
+    - Tom: profissional mas acessível
+    """
+
+# Chat completion body shared by every call; only the user message varies
+_REQUEST_BODY = {
+    "model": "gpt-4o",
+    "messages": [{"role": "system", "content": SYSTEM_PROMPT}],
+    "max_tokens": 500,
+    "temperature": 0.7
+}
+_SYSTEM_MESSAGE = _REQUEST_BODY["messages"][0]
+
+# Generated analyses by content hash (see analysis_cache_key), in memory
+# and in the ai_analysis_cache table. Only real OpenAI responses are
+# stored, never fallbacks.
+ANALYSIS_CACHE_TTL = 7 * 24 * 3600  # seconds
+_analysis_cache: TTLCache = TTLCache(maxsize=512, ttl=ANALYSIS_CACHE_TTL)
+
+# Shared OpenAI HTTP client (connection pool + TLS session), opened at startup
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+OPENAI_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=100)
+_http_client: Optional[httpx.AsyncClient] = None
+
+# Caps in-flight OpenAI requests so report fan-out stays under rate limits
+_llm_semaphore = asyncio.Semaphore(max(1, settings.max_llm_concurrency))
+
+
+def _new_ai_client() -> httpx.AsyncClient:
+    """OpenAI client with a keep-alive pool, multiplexed over HTTP/2 when h2 is installed."""
+    return httpx.AsyncClient(
+        base_url=OPENAI_BASE_URL,
+        timeout=30.0,
+        limits=OPENAI_LIMITS,
+        http2=HTTP2_AVAILABLE
+    )
+
 
-@dataclass
+def init_ai_client() -> httpx.AsyncClient:
+    """Create the shared OpenAI client. Called from the app lifespan."""
+    global _http_client
+    if _http_client is None:
+        _http_client = _new_ai_client()
+    return _http_client
+
+
+async def close_ai_client():
+    """Close the shared OpenAI client."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+@asynccontextmanager
+async def _ai_client() -> AsyncIterator[httpx.AsyncClient]:
+    """The shared client, or a one-off one outside the app (e.g. scripts)."""
+    if _http_client is not None:
+        yield _http_client
+    else:
+        async with _new_ai_client() as client:
+            yield client
+
+
+@dataclass(slots=True, frozen=True)
 class WeeklyStats:
     """Stats format matching esqueleto.md for AI analysis."""
     arp: float | None  # Average Rank Position
@@ -22,18 +112,112 @@ class WeeklyStats:
     total_points: int  # Total grid points (e.g., 25 for 5x5)
 
 
+def analysis_cache_key(
+    business_name: str,
+    current_stats: WeeklyStats,
+    prev_stats: Optional[WeeklyStats],
+    actions: Optional[str]
+) -> str:
+    """
+    Content hash of everything that goes into the prompt, plus
+    PROMPT_VERSION. Equal inputs mean an equivalent analysis.
+    """
+    raw = orjson.dumps(
+        {
+            "b": business_name,
+            "c": asdict(current_stats),
+            "p": asdict(prev_stats) if prev_stats else None,
+            "a": actions,
+            "v": PROMPT_VERSION,
+        },
+        option=orjson.OPT_SORT_KEYS
+    )
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+# The cache statements run in savepoints on the (possibly caller's) session:
+# a failure rolls back only the savepoint, not the caller's transaction and
+# loaded objects. Committing is left to whoever owns the session.
+
+async def _get_cached_analysis(db: AsyncSession, key: str) -> Optional[str]:
+    """Cached analysis from memory, then the database; None on miss."""
+    cached = _analysis_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    try:
+        async with db.begin_nested():
+            result = await db.execute(
+                select(AIAnalysisCache.analysis).where(
+                    AIAnalysisCache.key == key,
+                    AIAnalysisCache.created_at > func.now() - timedelta(seconds=ANALYSIS_CACHE_TTL)
+                )
+            )
+            cached = result.scalar_one_or_none()
+    except Exception as e:
+        logger.warning(f"AI analysis cache lookup failed: {e}")
+        return None
+    
+    if cached is not None:
+        _analysis_cache[key] = cached
+    return cached
+
+
+async def _store_analysis(db: AsyncSession, key: str, analysis: str):
+    """
+    Save an analysis to both cache tiers (upsert refreshes the TTL).
+    
+    The row is written in db's transaction; it persists once the session's
+    owner commits.
+    """
+    _analysis_cache[key] = analysis
+    
+    stmt = insert(AIAnalysisCache).values(key=key, analysis=analysis)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[AIAnalysisCache.key],
+        set_={"analysis": stmt.excluded.analysis, "created_at": func.now()}
+    )
+    try:
+        async with db.begin_nested():
+            await db.execute(stmt)
+    except Exception as e:
+        logger.warning(f"AI analysis cache write failed: {e}")
+
+
+async def prune_analysis_cache() -> int:
+    """
+    Delete cached analyses older than ANALYSIS_CACHE_TTL.
+    
+    Lookups already ignore them; this keeps the table from growing
+    without bound. Scheduled daily by the scheduler.
+    
+    Returns:
+        Number of rows deleted
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            delete(AIAnalysisCache).where(
+                AIAnalysisCache.created_at <= func.now() - timedelta(seconds=ANALYSIS_CACHE_TTL)
+            )
+        )
+        await db.commit()
+    return result.rowcount
+
+
 async def get_ai_analysis(
     business_name: str,
     current_stats: WeeklyStats,
     prev_stats: Optional[WeeklyStats],
     actions: Optional[str] = None,
-    api_key: Optional[str] = None
+    api_key: Optional[str] = None,
+    db: Optional[AsyncSession] = None
 ) -> str:
     """
     Generate an AI-powered analysis report for WhatsApp delivery.
     
     Uses OpenAI GPT-4o to create a consultative narrative comparing
-    current performance with previous week.
+    current performance with previous week. Results are cached by
+    analysis_cache_key, so identical inputs skip OpenAI for 7 days.
     
     Args:
         business_name: Name of the business being analyzed
@@ -41,6 +225,9 @@ async def get_ai_analysis(
         prev_stats: Previous week's statistics (or None if first scan)
         actions: Team actions taken this week (for context)
         api_key: OpenAI API key (uses settings if not provided)
+        db: Session for the cache table, e.g. the request's own; the
+            caller commits it to persist a new analysis. A one-off
+            session is opened (and committed) if not provided.
     
     Returns:
         Formatted report text ready for WhatsApp.
@@ -55,17 +242,22 @@ async def get_ai_analysis(
     if not key:
         return _generate_fallback_report(business_name, current_stats, prev_stats, actions)
     
-    system_prompt = """
-    Você é o Lead Growth Analyst da Locuz. Sua missão é escrever um relatório de SEO Local 
-    para WhatsApp. Seja direto, use emojis e foque em resultados. 
-    Compare os dados atuais com os da semana passada.
+    if db is None:
+        # Outside a request (e.g. scripts): one session for lookup and store
+        async with AsyncSessionLocal() as session:
+            analysis = await get_ai_analysis(
+                business_name, current_stats, prev_stats, actions, api_key, db=session
+            )
+            try:
+                await session.commit()
+            except Exception as e:
+                logger.warning(f"AI analysis cache write failed: {e}")
+            return analysis
     
-    Formato esperado:
-    - Máximo 300 palavras
-    - Use emojis para destacar pontos importantes
-    - Inclua: resumo de performance, comparativo, e próximos passos
-    - Tom: profissional mas acessível
-    """
+    cache_key = analysis_cache_key(business_name, current_stats, prev_stats, actions)
+    cached = await _get_cached_analysis(db, cache_key)
+    if cached is not None:
+        return cached
     
     # Build comparison text
     if prev_stats:
@@ -92,28 +284,25 @@ async def get_ai_analysis(
     """
     
     try:
-        async with httpx.AsyncClient() as client:
+        async with _llm_semaphore, _ai_client() as client:
             response = await client.post(
-                "https://api.openai.com/v1/chat/completions",
+                "/chat/completions",
                 headers={
                     "Authorization": f"Bearer {key}",
                     "Content-Type": "application/json"
                 },
-                json={
-                    "model": "gpt-4o",
-                    "messages": [
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_content}
-                    ],
-                    "max_tokens": 500,
-                    "temperature": 0.7
-                },
-                timeout=30.0
+                # Encode/decode with orjson rather than httpx's stdlib json
+                content=orjson.dumps({
+                    **_REQUEST_BODY,
+                    "messages": [_SYSTEM_MESSAGE, {"role": "user", "content": user_content}]
+                })
             )
             
             if response.status_code == 200:
-                data = response.json()
-                return data["choices"][0]["message"]["content"]
+                data = orjson.loads(response.content)
+                analysis = data["choices"][0]["message"]["content"]
+                await _store_analysis(db, cache_key, analysis)
+                return analysis
             else:
                 # Fallback on API error
                 return _generate_fallback_report(business_name, current_stats, prev_stats, actions)
@@ -122,6 +311,21 @@ async def get_ai_analysis(
         return _generate_fallback_report(business_name, current_stats, prev_stats, actions)
 
 
+# Fallback report layout; {delta} and {actions} are optional blocks that
+# carry their own leading newlines
+_FALLBACK_TEMPLATE = (
+    "📊 *Relatório Semanal - {business_name}*\n"
+    "\n"
+    "📍 *Visibilidade Local*\n"
+    "• Posição Média (ARP): {arp}\n"
+    "• Top 3: {top3}/{total_points} pontos"
+    "{delta}"
+    "{actions}\n"
+    "\n"
+    "_Relatório gerado por GBP Audit Bot - Locuz_"
+)
+
+
 def _generate_fallback_report(
     business_name: str,
     current_stats: WeeklyStats,
@@ -131,24 +335,19 @@ def _generate_fallback_report(
     """
     Generate a simple report without AI when OpenAI is unavailable.
     """
-    lines = [
-        f"📊 *Relatório Semanal - {business_name}*",
-        "",
-        "📍 *Visibilidade Local*",
-        f"• Posição Média (ARP): {current_stats.arp or 'N/A'}",
-        f"• Top 3: {current_stats.top3}/{current_stats.total_points} pontos",
-    ]
-    
+    delta = ""
     if prev_stats and prev_stats.arp and current_stats.arp:
         diff = prev_stats.arp - current_stats.arp
         if diff > 0:
-            lines.append(f"• Melhoria: ⬆️ +{diff:.1f} posições")
+            delta = f"\n• Melhoria: ⬆️ +{diff:.1f} posições"
         elif diff < 0:
-            lines.append(f"• Variação: ⬇️ {diff:.1f} posições")
-    
-    if actions:
-        lines.extend(["", "🎯 *Ações da Semana*", f"• {actions}"])
-    
-    lines.extend(["", "_Relatório gerado por GBP Audit Bot - Locuz_"])
+            delta = f"\n• Variação: ⬇️ {diff:.1f} posições"
     
-    return "\n".join(lines)
+    return _FALLBACK_TEMPLATE.format(
+        business_name=business_name,
+        arp=current_stats.arp or 'N/A',
+        top3=current_stats.top3,
+        total_points=current_stats.total_points,
+        delta=delta,
+        actions=f"\n\n🎯 *Ações da Semana*\n• {actions}" if actions else ""
+    )
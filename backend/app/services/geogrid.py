@@ -6,26 +6,56 @@ Uses linear approximation suitable for short distances (up to 50km radius).
 """
 import math
 from dataclasses import dataclass
-from typing import List
+from functools import lru_cache
+from typing import List, Sequence, Tuple
 
+import numpy as np
 
-@dataclass
+from app.rank_colors import MAX_TRACKED_RANK, RANK_COLORS, NOT_FOUND_COLOR, get_rank_color  # noqa: F401  (re-exported)
+from app.services.jit import njit, NUMBA_AVAILABLE
+
+
+# Supported grid dimensions, and SERP credits per grid (one per point)
+GRID_SIZES = frozenset((3, 5, 7))
+_CREDITS_BY_SIZE = {size: size * size for size in GRID_SIZES}
+
+# Linear approximation limit; see generate_geogrid
+MAX_RADIUS_KM = 50.0
+
+# Meters per degree of latitude (constant on Earth)
+METERS_PER_LAT_DEGREE = 111111
+
+# Point labels by [y][x], shared by every grid size (labels don't depend on it)
+_POINT_LABELS = tuple(
+    tuple(f"Ponto_{y}_{x}" for x in range(max(GRID_SIZES)))
+    for y in range(max(GRID_SIZES))
+)
+
+
+@dataclass(slots=True, frozen=True)
 class GridPoint:
     """
     Represents a single point in the geogrid.
     
+    Frozen, since generated grids are cached and shared between callers.
+    
     Attributes:
         x: Grid column position (0-indexed, left to right)
         y: Grid row position (0-indexed, top to bottom)
         latitude: Geographic latitude in degrees
         longitude: Geographic longitude in degrees
-        label: Human-readable label for the point
+        label: Human-readable label for the point (derived from x/y)
     """
     x: int
     y: int
     latitude: float
     longitude: float
-    label: str
+    
+    @property
+    def label(self) -> str:
+        if 0 <= self.y < len(_POINT_LABELS) and 0 <= self.x < len(_POINT_LABELS):
+            return _POINT_LABELS[self.y][self.x]
+        return f"Ponto_{self.y}_{self.x}"
 
 
 def generate_geogrid(
@@ -33,7 +63,7 @@ def generate_geogrid(
     center_lng: float,
     radius_km: float,
     grid_size: int = 5
-) -> List[GridPoint]:
+) -> Tuple[GridPoint, ...]:
     """
     Generate a square grid of coordinates around a center point.
     
@@ -50,8 +80,9 @@ def generate_geogrid(
         grid_size: Grid dimension (3, 5, or 7). Creates grid_size × grid_size points.
     
     Returns:
-        List of GridPoint objects representing all points in the grid,
-        ordered from top-left to bottom-right (row by row).
+        Tuple of GridPoint objects representing all points in the grid,
+        ordered from top-left to bottom-right (row by row). Results are
+        memoized per (center quantized to 1e-6°, radius, grid_size).
     
     Raises:
         ValueError: If grid_size is not 3, 5, or 7, or if radius is negative.
@@ -63,17 +94,35 @@ def generate_geogrid(
         >>> points[4].label  # Center point
         'Ponto_1_1'
     """
-    if grid_size not in [3, 5, 7]:
+    if grid_size not in GRID_SIZES:
         raise ValueError("Grid size must be 3, 5, or 7")
     
     if radius_km <= 0:
         raise ValueError("Radius must be positive")
     
-    if radius_km > 50:
+    if radius_km > MAX_RADIUS_KM:
         raise ValueError("Radius must not exceed 50km for accurate calculations")
     
-    points: List[GridPoint] = []
+    return _generate_geogrid_cached(
+        round(center_lat, 6),
+        round(center_lng, 6),
+        float(radius_km),
+        grid_size
+    )
+
+
+@lru_cache(maxsize=512)
+def _grid_offsets(
+    center_lat: float,
+    radius_km: float,
+    grid_size: int
+) -> Tuple[Tuple[float, ...], Tuple[float, ...]]:
+    """
+    Per-row latitude and per-column longitude offsets, in degrees.
     
+    Depends only on latitude (via cos), radius and grid size, so a project
+    scanned weekly reuses them even when its grid isn't cached.
+    """
     # Distance between each point in meters
     # Total diameter = 2 * radius, divided by (grid_size - 1) intervals
     step_distance_m = (radius_km * 2000) / (grid_size - 1)
@@ -81,36 +130,44 @@ def generate_geogrid(
     # Offset from center to reach the edge (in grid units)
     half_size = (grid_size - 1) / 2
     
-    # Meters per degree of latitude (constant on Earth)
-    METERS_PER_LAT_DEGREE = 111111
-    
     # Meters per degree of longitude (varies by latitude)
     meters_per_lng_degree = METERS_PER_LAT_DEGREE * math.cos(math.radians(center_lat))
     
-    for row in range(grid_size):
-        for col in range(grid_size):
-            # Calculate offset in meters from center
-            # Positive offset_lat = North, Positive offset_lng = East
-            offset_lat_m = (half_size - row) * step_distance_m
-            offset_lng_m = (col - half_size) * step_distance_m
-            
-            # Convert meters to degrees
-            delta_lat = offset_lat_m / METERS_PER_LAT_DEGREE
-            delta_lng = offset_lng_m / meters_per_lng_degree
-            
-            # Calculate final coordinates
-            new_lat = center_lat + delta_lat
-            new_lng = center_lng + delta_lng
-            
-            points.append(GridPoint(
-                x=col,
-                y=row,
-                latitude=round(new_lat, 6),
-                longitude=round(new_lng, 6),
-                label=f"Ponto_{row}_{col}"
-            ))
-    
-    return points
+    # Step between points in degrees; one division per axis, then
+    # multiplies per row/column
+    lat_step = step_distance_m / METERS_PER_LAT_DEGREE
+    lng_step = step_distance_m / meters_per_lng_degree
+    
+    # Offsets from center, one per row/column
+    # Positive offset_lat = North, Positive offset_lng = East
+    lat_offsets = tuple((half_size - step) * lat_step for step in range(grid_size))
+    lng_offsets = tuple((step - half_size) * lng_step for step in range(grid_size))
+    return lat_offsets, lng_offsets
+
+
+@lru_cache(maxsize=1024)
+def _generate_geogrid_cached(
+    center_lat: float,
+    center_lng: float,
+    radius_km: float,
+    grid_size: int
+) -> Tuple[GridPoint, ...]:
+    """Grid computation behind generate_geogrid (arguments already validated)."""
+    lat_offsets, lng_offsets = _grid_offsets(center_lat, radius_km, grid_size)
+    
+    # Scalar math: at most 7 rows/columns, and every point becomes a
+    # Python object anyway, so NumPy broadcasting only adds overhead.
+    # Full precision internally; API responses round to 6dp on output.
+    latitudes = [center_lat + offset for offset in lat_offsets]
+    longitudes = [center_lng + offset for offset in lng_offsets]
+    
+    # List comprehension + positional fields (x, y, latitude, longitude):
+    # measurably cheaper than a generator with keyword arguments
+    return tuple([
+        GridPoint(x, y, latitudes[y], longitudes[x])
+        for y in range(grid_size)
+        for x in range(grid_size)
+    ])
 
 
 def estimate_credits(grid_size: int) -> int:
@@ -133,10 +190,10 @@ def estimate_credits(grid_size: int) -> int:
         >>> estimate_credits(7)
         49
     """
-    if grid_size not in [3, 5, 7]:
-        raise ValueError("Grid size must be 3, 5, or 7")
-    
-    return grid_size * grid_size
+    try:
+        return _CREDITS_BY_SIZE[grid_size]
+    except (KeyError, TypeError):
+        raise ValueError("Grid size must be 3, 5, or 7") from None
 
 
 def calculate_visibility_score(ranks: List[int | None], grid_size: int) -> float:
@@ -166,7 +223,8 @@ def calculate_visibility_score(ranks: List[int | None], grid_size: int) -> float
     max_score = total_points * 20  # 20 is the max rank we track
     
     # Sum of all ranks (None = not found = 20)
-    rank_sum = sum(rank if rank is not None else 20 for rank in ranks)
+    found = [rank for rank in ranks if rank is not None]
+    rank_sum = sum(found) + (len(ranks) - len(found)) * 20
     
     # Calculate score (invert so higher is better)
     score = ((max_score - rank_sum) / (max_score - total_points)) * 100
@@ -198,26 +256,54 @@ def calculate_average_rank(ranks: List[int | None]) -> float | None:
     return round(sum(valid_ranks) / len(valid_ranks), 2)
 
 
-def get_rank_color(rank: int | None) -> str:
+# Compact color codes for the bulk kernel: code -> name, rank -> code
+COLOR_NAMES = ("red", "green", "yellow")
+_RANK_COLOR_CODES = np.array([COLOR_NAMES.index(c) for c in RANK_COLORS], dtype=np.uint8)
+
+
+def _rank_color_codes_loop(ranks: np.ndarray, table: np.ndarray) -> np.ndarray:
+    """Per-point color codes (Numba kernel); out-of-range ranks get code 0."""
+    out = np.zeros(ranks.shape[0], dtype=np.uint8)
+    max_rank = table.shape[0] - 1
+    for i in range(ranks.shape[0]):
+        r = ranks[i]
+        if 0 < r <= max_rank:
+            out[i] = table[r]
+    return out
+
+
+def _rank_color_codes_numpy(ranks: np.ndarray, table: np.ndarray) -> np.ndarray:
+    """Vectorized NumPy equivalent of _rank_color_codes_loop."""
+    valid = (ranks > 0) & (ranks < table.shape[0])
+    return np.where(valid, table[np.where(valid, ranks, 0)], 0).astype(np.uint8)
+
+
+# Compiled eagerly for its one signature, at import (loaded from the
+# on-disk cache after the first run), so no request pays JIT latency
+_rank_color_codes = (
+    njit("uint8[:](int64[:], uint8[:])", cache=True)(_rank_color_codes_loop)
+    if NUMBA_AVAILABLE else _rank_color_codes_numpy
+)
+
+
+def get_rank_colors(ranks: List[int | None]) -> List[str]:
     """
-    Get the display color for a rank position.
+    Get display colors for many rank positions at once.
     
-    Color coding:
-    - Green: Positions 1-3 (Local Pack / Dominance)
-    - Yellow: Positions 4-10 (Visible but outside Local Pack)
-    - Red: Positions 11+ or not found (Invisible to most users)
+    Same mapping as get_rank_color, computed in a single compiled (Numba)
+    or vectorized (NumPy) pass for large grids.
     
     Args:
-        rank: Rank position (1-20) or None if not found
+        ranks: Rank positions, None where the business wasn't found
     
     Returns:
-        Color name: 'green', 'yellow', or 'red'
+        Color names in the same order as ranks
     """
-    if rank is None or rank > 10:
-        return "red"
-    if rank <= 3:
-        return "green"
-    return "yellow"
+    codes = _rank_color_codes(
+        np.array([0 if r is None else r for r in ranks], dtype=np.int64),
+        _RANK_COLOR_CODES
+    )
+    return [COLOR_NAMES[c] for c in codes.tolist()]
 
 
 def count_top3(ranks: List[int | None]) -> int:
@@ -252,7 +338,7 @@ def count_top10(ranks: List[int | None]) -> int:
     return len([r for r in ranks if r is not None and r <= 10])
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ScanStats:
     """
     Scan statistics as defined in esqueleto.md.
@@ -292,11 +378,110 @@ def calculate_scan_stats(ranks: List[int | None], grid_size: int) -> ScanStats:
         >>> stats.top3
         3
     """
+    total_points = grid_size * grid_size
+    max_score = total_points * 20  # None counts as rank 20, as in calculate_visibility_score
+    
+    # One pass over ranks instead of one per metric
+    found_sum = found_count = top3 = top10 = 0
+    rank_sum = 0
+    for r in ranks:
+        if r is None:
+            rank_sum += 20
+            continue
+        found_sum += r
+        found_count += 1
+        rank_sum += r
+        if r <= 10:
+            top10 += 1
+            if r <= 3:
+                top3 += 1
+    
+    score = ((max_score - rank_sum) / (max_score - total_points)) * 100
+    
     return ScanStats(
-        arp=calculate_average_rank(ranks),
-        top3=count_top3(ranks),
-        top10=count_top10(ranks),
-        visibility_score=calculate_visibility_score(ranks, grid_size),
-        total_points=grid_size * grid_size
+        arp=round(found_sum / found_count, 2) if found_count else None,
+        top3=top3,
+        top10=top10,
+        visibility_score=round(max(0, min(100, score)), 2),
+        total_points=total_points
     )
 
+
+@dataclass(slots=True, frozen=True)
+class ScanStatsBatch:
+    """
+    Scan statistics for many scans at once, one array entry per scan.
+    
+    Same metrics as ScanStats; arp is NaN where the business wasn't found.
+    """
+    arp: np.ndarray
+    top3: np.ndarray
+    top10: np.ndarray
+    visibility_score: np.ndarray
+    total_points: int
+
+
+def rank_matrix(scans: Sequence[Sequence[int | None]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Stack per-scan rank lists into the inputs of calculate_scan_stats_batch.
+    
+    Ranks are stored as int8 (one byte per point, so a 7x7 scan fits in
+    a cache line); they are at most MAX_TRACKED_RANK, well inside its range.
+    
+    Args:
+        scans: Rank lists of equal length (None = not found)
+    
+    Returns:
+        (ranks, found) matrices of shape (len(scans), points); not-found
+        ranks are stored as 0 and masked out by found
+    """
+    if not scans:
+        empty = np.zeros((0, 0), dtype=np.int8)
+        return empty, empty.astype(bool)
+    
+    ranks = np.array(
+        [[0 if r is None else r for r in scan] for scan in scans],
+        dtype=np.int8
+    )
+    return ranks, ranks > 0
+
+
+def calculate_scan_stats_batch(
+    ranks: np.ndarray,
+    found: np.ndarray,
+    grid_size: int
+) -> ScanStatsBatch:
+    """
+    Calculate calculate_scan_stats metrics for many scans in one pass.
+    
+    Each row is one scan; reductions run along axis 1, so dashboards
+    aggregating many scans avoid a Python loop per scan.
+    
+    Args:
+        ranks: (scans, points) rank matrix, e.g. from rank_matrix()
+        found: Boolean matrix of the same shape, False where not found
+        grid_size: Grid dimension (3, 5, or 7) shared by all scans
+    
+    Returns:
+        ScanStatsBatch whose i-th entries equal calculate_scan_stats(row i)
+    """
+    total_points = grid_size * grid_size
+    max_score = total_points * 20  # None counts as rank 20, as in calculate_visibility_score
+    
+    # Sums accumulate in int64 even for int8 ranks
+    found_count = np.count_nonzero(found, axis=1)
+    found_sum = np.where(found, ranks, 0).sum(axis=1, dtype=np.int64)
+    rank_sum = np.where(found, ranks, 20).sum(axis=1, dtype=np.int64)
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        arp = np.round(found_sum / found_count, 2)  # 0/0 -> NaN
+    
+    score = ((max_score - rank_sum) / (max_score - total_points)) * 100
+    
+    return ScanStatsBatch(
+        arp=arp,
+        top3=np.count_nonzero(found & (ranks <= 3), axis=1),
+        top10=np.count_nonzero(found & (ranks <= 10), axis=1),
+        visibility_score=np.round(np.clip(score, 0, 100), 2),
+        total_points=total_points
+    )
@@ -4,15 +4,38 @@ GBP Audit Bot - Heatmap Image Generator
 Generates visual heatmap images for reports using staticmap and Pillow.
 Based on mapadecalor.md specifications.
 """
+import hashlib
 import io
+import logging
+import os
+import tempfile
+import threading
 from typing import List, Optional, Tuple
 from dataclasses import dataclass
 
+import numpy as np
+from cachetools import LRUCache
 from staticmap import StaticMap, CircleMarker
 from PIL import Image, ImageDraw, ImageFont
 
+from app.config import get_settings
+from app.rank_colors import MAX_TRACKED_RANK, RANK_COLORS, NOT_FOUND_COLOR
 
-@dataclass
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+PNG_COMPRESS_LEVEL = 3
+TILE_URL_TEMPLATE = "https://a.tile.openstreetmap.org/{z}/{x}/{y}.png"
+TILE_CACHE_DIR = settings.tile_cache_dir or os.path.join(tempfile.gettempdir(), "gbp-audit-bot-tiles")
+
+
+# Hex values for the rank color names, and the same rank-indexed table
+COLOR_HEX = {"green": "#22c55e", "yellow": "#eab308", "red": "#ef4444"}
+RANK_COLORS_HEX = tuple(COLOR_HEX[c] for c in RANK_COLORS)
+
+
+@dataclass(slots=True, frozen=True)
 class MapPoint:
     """A point to render on the heatmap."""
     lat: float
@@ -23,11 +46,59 @@ class MapPoint:
 
 def get_rank_color_hex(rank: Optional[int]) -> str:
     """Get hex color for a rank position."""
-    if rank is None or rank > 10:
-        return "#ef4444"  # Red
-    if rank <= 3:
-        return "#22c55e"  # Green
-    return "#eab308"  # Yellow
+    if rank is not None and 0 < rank <= MAX_TRACKED_RANK:
+        return RANK_COLORS_HEX[rank]
+    return COLOR_HEX[NOT_FOUND_COLOR]
+
+
+# Composited base maps (tiles only, no markers) by viewport. Weekly scans
+# of a project share center and zoom, so repeat renders skip tile work.
+_base_layers: LRUCache = LRUCache(maxsize=64)
+_base_layers_lock = threading.Lock()
+
+
+class CachedStaticMap(StaticMap):
+    """
+    StaticMap that caches tiles on disk and whole base layers in memory.
+    
+    Tiles are fetched from staticmap's worker threads, so the disk cache
+    is written atomically and the base layer cache is behind a lock.
+    """
+    
+    def get(self, url, **kwargs):
+        path = os.path.join(TILE_CACHE_DIR, hashlib.blake2b(url.encode(), digest_size=16).hexdigest() + ".png")
+        try:
+            with open(path, "rb") as f:
+                return 200, f.read()
+        except OSError:
+            pass
+        
+        status_code, content = super().get(url, **kwargs)
+        if status_code == 200:
+            try:
+                os.makedirs(TILE_CACHE_DIR, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=TILE_CACHE_DIR)
+                with os.fdopen(fd, "wb") as f:
+                    f.write(content)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.warning(f"Could not cache map tile {url}: {e}")
+        return status_code, content
+    
+    def _draw_base_layer(self, image):
+        key = (
+            self.url_template, self.zoom, self.x_center, self.y_center,
+            self.width, self.height, self.tile_size, self.background_color
+        )
+        with _base_layers_lock:
+            base = _base_layers.get(key)
+        
+        if base is None:
+            super()._draw_base_layer(image)
+            with _base_layers_lock:
+                _base_layers[key] = image.copy()
+        else:
+            image.paste(base)
 
 
 def generate_heatmap_image(
@@ -49,7 +120,7 @@ def generate_heatmap_image(
         PNG image as bytes
     """
     # Create the static map
-    m = StaticMap(width, height, url_template='https://a.tile.openstreetmap.org/{z}/{x}/{y}.png')
+    m = CachedStaticMap(width, height, url_template=TILE_URL_TEMPLATE)
     
     # Add circle markers for each point
     for p in points:
@@ -67,14 +138,30 @@ def generate_heatmap_image(
         # Draw rank numbers on top of markers
         image = _draw_rank_labels(image, points, m)
     
-    # Convert to bytes
+    # Convert to bytes; zlib level 3 keeps most of the compression for a
+    # fraction of the CPU of optimize=True
     img_bytes = io.BytesIO()
-    image.save(img_bytes, format='PNG', optimize=True)
-    img_bytes.seek(0)
-    
+    image.save(img_bytes, format='PNG', compress_level=PNG_COMPRESS_LEVEL)
     return img_bytes.getvalue()
 
 
+LABEL_STROKE_WIDTH = 1
+
+
+def _load_font() -> ImageFont.ImageFont:
+    """Bold label font: Arial, then DejaVu Sans Bold, then Pillow's default."""
+    for path in ("arial.ttf", "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"):
+        try:
+            return ImageFont.truetype(path, 14)
+        except (IOError, OSError):
+            pass
+    return ImageFont.load_default()
+
+
+# Loaded once at import rather than per heatmap
+_FONT = _load_font()
+
+
 def _draw_rank_labels(
     image: Image.Image,
     points: List[MapPoint],
@@ -82,78 +169,60 @@ def _draw_rank_labels(
 ) -> Image.Image:
     """Draw rank numbers centered on each marker."""
     draw = ImageDraw.Draw(image)
+    font = _FONT
     
-    # Try to load a bold font, fall back to default
-    try:
-        font = ImageFont.truetype("arial.ttf", 14)
-    except (IOError, OSError):
-        try:
-            font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 14)
-        except (IOError, OSError):
-            font = ImageFont.load_default()
+    ranked = [p for p in points if p.rank is not None]
+    if not ranked:
+        return image
     
-    for p in points:
-        if p.rank is None:
-            continue
-        
-        # Convert lat/lng to pixel coordinates
-        try:
-            x, y = _latlon_to_pixels(p.lat, p.lng, static_map)
-        except Exception:
-            continue
-        
+    # Project every marker to pixel coordinates in one pass
+    xs, ys = _latlon_to_pixels(
+        np.array([p.lat for p in ranked]),
+        np.array([p.lng for p in ranked]),
+        static_map
+    )
+    
+    for p, x, y in zip(ranked, xs.tolist(), ys.tolist()):
         # Draw the rank number centered on the marker
         text = str(p.rank)
         
         # Get text bounding box for centering
-        bbox = draw.textbbox((0, 0), text, font=font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
-        
-        text_x = x - text_width / 2
-        text_y = y - text_height / 2
-        
-        # Draw text with outline for visibility
-        outline_color = "#000000"
-        for dx, dy in [(-1, -1), (-1, 1), (1, -1), (1, 1)]:
-            draw.text((text_x + dx, text_y + dy), text, font=font, fill=outline_color)
+        bbox = draw.textbbox((0, 0), text, font=font, stroke_width=LABEL_STROKE_WIDTH)
+        text_x = x - (bbox[2] - bbox[0]) / 2
+        text_y = y - (bbox[3] - bbox[1]) / 2
         
-        draw.text((text_x, text_y), text, font=font, fill="#ffffff")
+        # Draw text with a native outline for visibility
+        draw.text(
+            (text_x, text_y), text, font=font, fill="#ffffff",
+            stroke_width=LABEL_STROKE_WIDTH, stroke_fill="#000000"
+        )
     
     return image
 
 
-def _latlon_to_pixels(lat: float, lng: float, static_map: StaticMap) -> Tuple[int, int]:
-    """Convert latitude/longitude to pixel coordinates on the rendered map."""
-    import math
-    
-    # Get map center and zoom from staticmap internals
-    center = static_map.determine_extent()
-    zoom = center[2]
-    center_lat = (center[0][0] + center[1][0]) / 2
-    center_lng = (center[0][1] + center[1][1]) / 2
-    
-    # Mercator projection
-    def lat_to_y(lat):
-        return math.log(math.tan(math.pi / 4 + math.radians(lat) / 2))
-    
-    def lng_to_x(lng):
-        return math.radians(lng)
-    
-    # Calculate pixel offset from center
-    scale = 256 * (2 ** zoom)
+def _latlon_to_pixels(
+    lats: np.ndarray,
+    lngs: np.ndarray,
+    static_map: StaticMap
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convert latitudes/longitudes to pixel coordinates on the rendered map.
     
-    center_x = (lng_to_x(center_lng) + math.pi) / (2 * math.pi) * scale
-    center_y = (1 - lat_to_y(center_lat) / math.pi) / 2 * scale
+    Uses the zoom and center (in tile units) that StaticMap.render()
+    settled on, so it must be called after rendering.
+    """
+    scale = 2.0 ** static_map.zoom
     
-    point_x = (lng_to_x(lng) + math.pi) / (2 * math.pi) * scale
-    point_y = (1 - lat_to_y(lat) / math.pi) / 2 * scale
+    # Web Mercator tile coordinates, same formulas as staticmap
+    tile_x = (lngs + 180.0) / 360.0 * scale
+    lat_rad = np.radians(lats)
+    tile_y = (1 - np.log(np.tan(lat_rad) + 1 / np.cos(lat_rad)) / np.pi) / 2 * scale
     
     # Offset from center of image
-    x = static_map.width / 2 + (point_x - center_x)
-    y = static_map.height / 2 + (point_y - center_y)
+    x = static_map.width / 2 + (tile_x - static_map.x_center) * static_map.tile_size
+    y = static_map.height / 2 + (tile_y - static_map.y_center) * static_map.tile_size
     
-    return int(x), int(y)
+    return x.astype(int), y.astype(int)
 
 
 def save_heatmap_to_file(points: List[MapPoint], filepath: str) -> str:
@@ -0,0 +1,52 @@
+"""
+GBP Audit Bot - Shared HTTP Client
+
+Long-lived httpx client for outbound API calls (Scale SERP, WhatsApp
+gateway), so requests reuse pooled connections and TLS sessions instead
+of handshaking per batch or per message.
+"""
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import httpx
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+HTTP_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=32)
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _new_http_client() -> httpx.AsyncClient:
+    """Pooled client, multiplexed over HTTP/2 when h2 is installed."""
+    return httpx.AsyncClient(timeout=30.0, limits=HTTP_LIMITS, http2=HTTP2_AVAILABLE)
+
+
+def init_http_client() -> httpx.AsyncClient:
+    """Create the shared client. Called from the app lifespan."""
+    global _http_client
+    if _http_client is None:
+        _http_client = _new_http_client()
+    return _http_client
+
+
+async def close_http_client():
+    """Close the shared client."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+@asynccontextmanager
+async def http_client() -> AsyncIterator[httpx.AsyncClient]:
+    """The shared client, or a one-off one outside the app (e.g. scripts)."""
+    if _http_client is not None:
+        yield _http_client
+    else:
+        async with _new_http_client() as client:
+            yield client
@@ -0,0 +1,28 @@
+"""
+GBP Audit Bot - Optional Numba JIT
+
+Numba is an optional dependency used to compile hot per-point kernels for
+large grids. When it isn't installed, `njit` returns the function
+unchanged; modules with a vectorized NumPy alternative should check
+NUMBA_AVAILABLE and use that instead of the plain-Python loop.
+"""
+try:
+    from numba import njit as _numba_njit
+    NUMBA_AVAILABLE = True
+except ImportError:  # numba is optional
+    _numba_njit = None
+    NUMBA_AVAILABLE = False
+
+
+def njit(*args, **kwargs):
+    """
+    numba.njit when available, otherwise a no-op decorator.
+
+    Supports both `@njit` and `@njit(cache=True, ...)` forms.
+    """
+    if NUMBA_AVAILABLE:
+        return _numba_njit(*args, **kwargs)
+
+    if len(args) == 1 and callable(args[0]) and not kwargs:
+        return args[0]
+    return lambda func: func
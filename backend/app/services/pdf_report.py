@@ -3,10 +3,13 @@ GBP Audit Bot - PDF Report Generator
 
 Generates professional PDF reports using ReportLab.
 """
+import asyncio
 import io
+import logging
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional, List
+from typing import Optional, List, BinaryIO
 from dataclasses import dataclass
 
 from reportlab.lib import colors
@@ -16,9 +19,15 @@ from reportlab.lib.units import cm, mm
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 
-from PIL import Image as PILImage
+from PIL import Image as PILImage, UnidentifiedImageError
 
 
+logger = logging.getLogger(__name__)
+
+# Optional worker processes for rendering; ReportLab is pure Python and
+# holds the GIL, so threads only keep the event loop free
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+
 # Locuz brand colors
 LOCUZ_GREEN = colors.HexColor("#22c55e")
 LOCUZ_YELLOW = colors.HexColor("#eab308")
@@ -26,6 +35,63 @@ LOCUZ_RED = colors.HexColor("#ef4444")
 LOCUZ_DARK = colors.HexColor("#1C1E21")
 LOCUZ_ACCENT = colors.HexColor("#3b82f6")
 
+# Longest heatmap side embedded in the PDF (~190 dpi at the 16 cm width);
+# larger uploads are downscaled first instead of storing unseen pixels
+HEATMAP_MAX_PX = 1200
+
+# Paragraph styles, built once at import. They are never mutated after
+# construction, so sharing them across threads and reports is safe.
+_STYLES = getSampleStyleSheet()
+
+TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=_STYLES['Heading1'],
+    fontSize=24,
+    textColor=LOCUZ_ACCENT,
+    spaceAfter=12,
+    alignment=TA_CENTER
+)
+
+SUBTITLE_STYLE = ParagraphStyle(
+    'Subtitle',
+    parent=_STYLES['Normal'],
+    fontSize=12,
+    textColor=colors.gray,
+    alignment=TA_CENTER,
+    spaceAfter=20
+)
+
+SECTION_STYLE = ParagraphStyle(
+    'Section',
+    parent=_STYLES['Heading2'],
+    fontSize=14,
+    textColor=LOCUZ_DARK,
+    spaceBefore=16,
+    spaceAfter=8
+)
+
+BODY_STYLE = ParagraphStyle(
+    'Body',
+    parent=_STYLES['Normal'],
+    fontSize=11,
+    leading=14
+)
+
+LEGEND_STYLE = ParagraphStyle(
+    'Legend',
+    parent=BODY_STYLE,
+    alignment=TA_CENTER,
+    fontSize=9
+)
+
+FOOTER_STYLE = ParagraphStyle(
+    'Footer',
+    parent=BODY_STYLE,
+    alignment=TA_CENTER,
+    textColor=colors.gray,
+    fontSize=9
+)
+
 
 @dataclass
 class ReportData:
@@ -59,7 +125,7 @@ class ReportData:
     heatmap_image: Optional[bytes] = None
 
 
-def generate_pdf_report(data: ReportData) -> bytes:
+def generate_pdf_report(data: ReportData) -> io.BytesIO:
     """
     Generate a PDF report for the weekly scan.
     
@@ -67,11 +133,56 @@ def generate_pdf_report(data: ReportData) -> bytes:
         data: ReportData with all metrics and optional heatmap image
     
     Returns:
-        PDF file as bytes
+        PDF file in a BytesIO positioned at the start. Read it or use
+        getbuffer() for a zero-copy view; getvalue() copies the whole PDF.
     """
     buffer = io.BytesIO()
+    write_pdf_report(data, buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def init_pdf_pool(workers: int) -> Optional[ProcessPoolExecutor]:
+    """Start the PDF rendering process pool (no pool if workers is 0)."""
+    global _pdf_pool
+    if workers > 0 and _pdf_pool is None:
+        _pdf_pool = ProcessPoolExecutor(max_workers=workers)
+        logger.info(f"PDF process pool started with {workers} worker(s)")
+    return _pdf_pool
+
+
+def shutdown_pdf_pool():
+    """Shut down the PDF rendering process pool."""
+    global _pdf_pool
+    if _pdf_pool is not None:
+        _pdf_pool.shutdown(wait=False, cancel_futures=True)
+        _pdf_pool = None
+        logger.info("PDF process pool shut down")
+
+
+async def render_pdf_report(data: ReportData) -> io.BytesIO:
+    """
+    Generate a PDF report without blocking the event loop.
+    
+    Runs in the process pool when one is configured, otherwise in a
+    worker thread.
+    """
+    if _pdf_pool is not None:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_pdf_pool, generate_pdf_report, data)
+    return await asyncio.to_thread(generate_pdf_report, data)
+
+
+def write_pdf_report(data: ReportData, output: BinaryIO) -> None:
+    """
+    Write a PDF report for the weekly scan to a binary file-like object.
+    
+    Args:
+        data: ReportData with all metrics and optional heatmap image
+        output: Writable binary stream (file, BytesIO, ...)
+    """
     doc = SimpleDocTemplate(
-        buffer,
+        output,
         pagesize=A4,
         rightMargin=2*cm,
         leftMargin=2*cm,
@@ -79,61 +190,24 @@ def generate_pdf_report(data: ReportData) -> bytes:
         bottomMargin=2*cm
     )
     
-    # Styles
-    styles = getSampleStyleSheet()
-    
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=LOCUZ_ACCENT,
-        spaceAfter=12,
-        alignment=TA_CENTER
-    )
-    
-    subtitle_style = ParagraphStyle(
-        'Subtitle',
-        parent=styles['Normal'],
-        fontSize=12,
-        textColor=colors.gray,
-        alignment=TA_CENTER,
-        spaceAfter=20
-    )
-    
-    section_style = ParagraphStyle(
-        'Section',
-        parent=styles['Heading2'],
-        fontSize=14,
-        textColor=LOCUZ_DARK,
-        spaceBefore=16,
-        spaceAfter=8
-    )
-    
-    body_style = ParagraphStyle(
-        'Body',
-        parent=styles['Normal'],
-        fontSize=11,
-        leading=14
-    )
-    
     # Content elements
     elements = []
     
     # Header
-    elements.append(Paragraph("📍 GBP Audit Bot - Relatório Semanal", title_style))
+    elements.append(Paragraph("📍 GBP Audit Bot - Relatório Semanal", TITLE_STYLE))
     elements.append(Paragraph(
         f"<b>{data.business_name}</b><br/>"
         f"Análise gerada em {data.scan_date.strftime('%d/%m/%Y')}",
-        subtitle_style
+        SUBTITLE_STYLE
     ))
     elements.append(Spacer(1, 10))
     
     # Keyword info
-    # elements.append(Paragraph(f"🔍 Palavra-chave: <i>\"{data.keyword}\"</i>", body_style))
+    # elements.append(Paragraph(f"🔍 Palavra-chave: <i>\"{data.keyword}\"</i>", BODY_STYLE))
     # elements.append(Spacer(1, 15))
     
     # Metrics table
-    elements.append(Paragraph("📊 Resumo de Performance", section_style))
+    elements.append(Paragraph("📊 Resumo de Performance", SECTION_STYLE))
     
     metrics_data = [
         ["Métrica", "Atual", "Anterior", "Variação"],
@@ -174,26 +248,20 @@ def generate_pdf_report(data: ReportData) -> bytes:
     elements.append(table)
     elements.append(Spacer(1, 20))
     
-    # Heatmap image (if provided)
-    if data.heatmap_image:
-        elements.append(Paragraph("🗺️ Mapa de Calor (Geogrid)", section_style))
-        
-        # Load image to get actual dimensions and preserve aspect ratio
-        heatmap_img = PILImage.open(io.BytesIO(data.heatmap_image))
-        img_width, img_height = heatmap_img.size
-        aspect_ratio = img_height / img_width
-        
-        # Set width to fit page, calculate height to preserve aspect ratio
-        target_width = 16*cm  # Full page width (minus margins)
-        target_height = target_width * aspect_ratio
+    # Heatmap image (if provided and readable)
+    heatmap = _fit_heatmap(data.heatmap_image) if data.heatmap_image else None
+    if heatmap is not None:
+        elements.append(Paragraph("🗺️ Mapa de Calor (Geogrid)", SECTION_STYLE))
         
-        # Cap maximum height to avoid page overflow
-        max_height = 12*cm
-        if target_height > max_height:
-            target_height = max_height
-            target_width = target_height / aspect_ratio
-        
-        img = Image(io.BytesIO(data.heatmap_image), width=target_width, height=target_height)
+        # Fit within the page width and max height, preserving aspect ratio.
+        # ReportLab reads the size from the same reader it embeds, so the
+        # image is only opened once.
+        img = Image(
+            heatmap,
+            width=16*cm,  # Full page width (minus margins)
+            height=12*cm,  # Cap to avoid page overflow
+            kind='proportional'
+        )
         elements.append(img)
         elements.append(Spacer(1, 10))
         
@@ -203,44 +271,65 @@ def generate_pdf_report(data: ReportData) -> bytes:
             "<font color='#eab308'>● Amarelo (4-10)</font> &nbsp;&nbsp; "
             "<font color='#ef4444'>● Vermelho (11+)</font>"
         )
-        elements.append(Paragraph(legend_text, ParagraphStyle(
-            'Legend', parent=body_style, alignment=TA_CENTER, fontSize=9
-        )))
+        elements.append(Paragraph(legend_text, LEGEND_STYLE))
         elements.append(Spacer(1, 15))
     
     # AI Analysis
     if data.ai_analysis:
-        elements.append(Paragraph("💡 Análise do Especialista", section_style))
+        elements.append(Paragraph("💡 Análise do Especialista", SECTION_STYLE))
         # Split by lines and format
         for line in data.ai_analysis.split('\n'):
             if line.strip():
-                elements.append(Paragraph(line.strip(), body_style))
+                elements.append(Paragraph(line.strip(), BODY_STYLE))
         elements.append(Spacer(1, 15))
     
     # Weekly actions
     if data.weekly_actions:
-        elements.append(Paragraph("🛠️ Ações da Equipe Esta Semana", section_style))
-        elements.append(Paragraph(data.weekly_actions, body_style))
+        elements.append(Paragraph("🛠️ Ações da Equipe Esta Semana", SECTION_STYLE))
+        elements.append(Paragraph(data.weekly_actions, BODY_STYLE))
         elements.append(Spacer(1, 15))
     
     # Footer
     elements.append(Spacer(1, 30))
-    footer_style = ParagraphStyle(
-        'Footer', parent=body_style, 
-        alignment=TA_CENTER, 
-        textColor=colors.gray,
-        fontSize=9
-    )
     elements.append(Paragraph(
         "Relatório gerado automaticamente por <b>GBP Audit Bot</b> | Locuz ⚡",
-        footer_style
+        FOOTER_STYLE
     ))
     
     # Build PDF
     doc.build(elements)
-    buffer.seek(0)
+
+
+def _fit_heatmap(image: bytes) -> Optional[BinaryIO]:
+    """
+    Heatmap image as a stream for embedding, downscaled to HEATMAP_MAX_PX
+    on its longest side when larger.
+    
+    Small images are passed through untouched (PIL only reads the header).
+    ReportLab re-compresses the pixels itself, so the resized copy is
+    saved with fast PNG compression.
+    
+    Returns None for bytes PIL can't read (e.g. a non-image upload), so
+    the report is generated without the map.
+    """
+    try:
+        with PILImage.open(io.BytesIO(image)) as heatmap_img:
+            if max(heatmap_img.size) <= HEATMAP_MAX_PX:
+                return io.BytesIO(image)
+            
+            heatmap_img.thumbnail((HEATMAP_MAX_PX, HEATMAP_MAX_PX), PILImage.LANCZOS)
+            resized = io.BytesIO()
+            heatmap_img.save(resized, format="PNG", compress_level=1)
+    except (UnidentifiedImageError, OSError) as e:
+        logger.warning(f"Skipping unreadable heatmap image: {e}")
+        return None
     
-    return buffer.getvalue()
+    resized.seek(0)
+    return resized
+
+
+# Change labels: decrease, stable, increase
+_CHANGE_FORMATS = ("↓ -{:.1f}", "→ Estável", "↑ +{:.1f}")
 
 
 def _format_change(prev: Optional[float], current: Optional[float], reverse: bool = False) -> str:
@@ -248,13 +337,10 @@ def _format_change(prev: Optional[float], current: Optional[float], reverse: boo
     if prev is None or current is None:
         return "—"
     
-    diff = current - prev
-    if reverse:
-        diff = -diff  # For ARP, lower is better
+    # For ARP, lower is better
+    diff = prev - current if reverse else current - prev
+    magnitude = abs(diff)
     
-    if abs(diff) < 0.01:
-        return "→ Estável"
-    elif diff > 0:
-        return f"↑ +{abs(diff):.1f}"
-    else:
-        return f"↓ -{abs(diff):.1f}"
+    if magnitude < 0.01:
+        return _CHANGE_FORMATS[1]
+    return _CHANGE_FORMATS[2 if diff > 0 else 0].format(magnitude)
@@ -7,16 +7,22 @@ Runs every Monday at the configured time (default: 9:00 AM Sao Paulo).
 import asyncio
 import logging
 from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
-from sqlalchemy import select
+from apscheduler.triggers.interval import IntervalTrigger
+from sqlalchemy import select, update, func, and_
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, load_only, undefer
 
 from app.config import get_settings
 from app.database import AsyncSessionLocal
-from app.models.models import Project, Scan, ScanPoint
+from app.auth import invalidate_cached_user
+from app.models.models import User, Project, Scan
 from app.services.whatsapp import send_weekly_report
+from app.services.ai_analysis import prune_analysis_cache
 from app.services.geogrid import get_rank_color
 from app.services.heatmap import MapPoint, generate_heatmap_image
 
@@ -53,6 +59,22 @@ def init_scheduler() -> AsyncIOScheduler:
         replace_existing=True
     )
     
+    scheduler.add_job(
+        fail_stale_scans,
+        trigger=IntervalTrigger(minutes=5),
+        id="fail_stale_scans",
+        name="Fail and refund abandoned scans",
+        replace_existing=True
+    )
+    
+    scheduler.add_job(
+        prune_analysis_cache,
+        trigger=IntervalTrigger(hours=24),
+        id="prune_ai_analysis_cache",
+        name="Delete expired AI analyses",
+        replace_existing=True
+    )
+    
     scheduler.start()
     logger.info(
         f"Scheduler started. Weekly reports scheduled for {settings.weekly_report_day} "
@@ -80,7 +102,8 @@ async def send_all_weekly_reports():
     1. Fetches all projects with whatsapp_enabled=True
     2. For each project, gets the latest 2 scans
     3. Generates heatmap image from latest scan
-    4. Sends formatted report via WhatsApp
+    4. Sends formatted reports via WhatsApp, up to
+       settings.whatsapp_concurrency at a time
     """
     logger.info("Starting weekly WhatsApp report job...")
     
@@ -89,49 +112,170 @@ async def send_all_weekly_reports():
         return
     
     async with AsyncSessionLocal() as db:
-        # Fetch all projects with WhatsApp enabled
-        result = await db.execute(
-            select(Project).where(
-                Project.whatsapp_enabled == True,
-                Project.whatsapp_group_id.isnot(None)
-            )
-        )
-        projects = result.scalars().all()
+        # Fetch all projects with WhatsApp enabled, with their latest scans
+        targets = await _fetch_report_targets(db)
         
-        if not projects:
+        if not targets:
             logger.info("No projects with WhatsApp enabled. Skipping.")
             return
         
-        logger.info(f"Found {len(projects)} project(s) with WhatsApp enabled")
+        logger.info(f"Found {len(targets)} project(s) with WhatsApp enabled")
         
-        success_count = 0
-        error_count = 0
+        # Reports are sent concurrently under the gateway limit. With the
+        # scans prefetched, send_project_report makes no DB calls, so the
+        # session isn't used concurrently.
+        semaphore = asyncio.Semaphore(max(1, settings.whatsapp_concurrency))
         
-        for project in projects:
-            try:
-                await send_project_report(db, project)
-                success_count += 1
-            except Exception as e:
-                logger.error(f"Failed to send report for project {project.id}: {e}")
-                error_count += 1
+        async def run(project: Project, scans: List[Scan]) -> bool:
+            async with semaphore:
+                try:
+                    await send_project_report(db, project, scans)
+                    return True
+                except Exception as e:
+                    logger.error(f"Failed to send report for project {project.id}: {e}")
+                    return False
+        
+        results = await asyncio.gather(*(run(project, scans) for project, scans in targets))
+        success_count = sum(results)
+        error_count = len(results) - success_count
         
         logger.info(
             f"Weekly report job completed. Success: {success_count}, Errors: {error_count}"
         )
 
 
-async def send_project_report(db: AsyncSession, project: Project):
-    """Send weekly report for a single project."""
-    logger.info(f"Sending report for project: {project.business_name}")
+async def fail_stale_scans() -> int:
+    """
+    Fail scans stuck in "running" and refund their credits.
+    
+    execute_search commits a running scan (and its credit reservation)
+    before the SERP calls; if that process dies mid-search, nothing else
+    would ever finish it. Scans running for longer than
+    settings.scan_stale_minutes are marked failed and each owner gets
+    their reserved credits back, in one statement.
+    
+    Returns:
+        Number of users refunded
+    """
+    stale = (
+        update(Scan)
+        .where(
+            Scan.status == "running",
+            Scan.executed_at < func.now() - timedelta(minutes=settings.scan_stale_minutes)
+        )
+        .values(status="failed")
+        .returning(Scan.project_id, Scan.credits_used)
+        .cte("stale")
+    )
+    refunds = (
+        select(Project.user_id, func.sum(stale.c.credits_used).label("credits"))
+        .join(stale, stale.c.project_id == Project.id)
+        .group_by(Project.user_id)
+        .subquery()
+    )
+    
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(User)
+            .where(User.id == refunds.c.user_id)
+            .values(credits_balance=User.credits_balance + refunds.c.credits)
+            .returning(User.id)
+            .execution_options(synchronize_session=False)
+        )
+        user_ids = result.scalars().all()
+        await db.commit()
+    
+    for user_id in user_ids:
+        invalidate_cached_user(user_id)
+    if user_ids:
+        logger.warning(f"Failed stale scans and refunded {len(user_ids)} user(s)")
+    return len(user_ids)
+
+
+def _report_scan_columns(scan=Scan) -> tuple:
+    """Scan columns send_project_report reads (for load_only)."""
+    return (
+        scan.id,
+        scan.grid_size,
+        scan.average_rank,
+        scan.top3_count,
+        scan.visibility_score,
+        scan.executed_at
+    )
+
+
+async def _fetch_report_targets(db: AsyncSession) -> List[Tuple[Project, List[Scan]]]:
+    """
+    WhatsApp-enabled projects, each with its latest 2 completed scans
+    (newest first; empty if it has none).
+    
+    One query: ROW_NUMBER() ranks each project's completed scans, and the
+    outer join keeps projects that have no scans yet.
+    """
+    enabled = (
+        Project.whatsapp_enabled == True,
+        Project.whatsapp_group_id.isnot(None)
+    )
+    ranked = (
+        select(
+            Scan,
+            func.row_number().over(
+                partition_by=Scan.project_id,
+                order_by=Scan.executed_at.desc()
+            ).label("rn")
+        )
+        .join(Scan.project)
+        .where(Scan.status == "completed", *enabled)
+        .subquery()
+    )
+    latest_scan = aliased(Scan, ranked)
     
-    # Get latest 2 scans
     result = await db.execute(
-        select(Scan)
-        .where(Scan.project_id == project.id, Scan.status == "completed")
-        .order_by(Scan.executed_at.desc())
-        .limit(2)
+        select(Project, latest_scan)
+        .outerjoin(ranked, and_(ranked.c.project_id == Project.id, ranked.c.rn <= 2))
+        .options(
+            load_only(
+                Project.business_name,
+                Project.whatsapp_group_id,
+                Project.weekly_actions
+            ),
+            load_only(*_report_scan_columns(latest_scan))
+        )
+        .where(*enabled)
+        .order_by(Project.id, ranked.c.rn)
     )
-    scans = result.scalars().all()
+    
+    targets: Dict[UUID, Tuple[Project, List[Scan]]] = {}
+    for project, scan in result.all():
+        _, scans = targets.setdefault(project.id, (project, []))
+        if scan is not None:
+            scans.append(scan)
+    return list(targets.values())
+
+
+async def send_project_report(
+    db: AsyncSession,
+    project: Project,
+    scans: Optional[List[Scan]] = None
+):
+    """
+    Send weekly report for a single project.
+    
+    scans are the project's latest completed scans, newest first; they
+    are queried when not provided.
+    """
+    logger.info(f"Sending report for project: {project.business_name}")
+    
+    if scans is None:
+        # Get latest 2 scans
+        result = await db.execute(
+            select(Scan)
+            .options(load_only(*_report_scan_columns()))
+            .where(Scan.project_id == project.id, Scan.status == "completed")
+            .order_by(Scan.executed_at.desc())
+            .limit(2)
+        )
+        scans = result.scalars().all()
     
     if not scans:
         logger.warning(f"No completed scans for project {project.id}. Skipping.")
@@ -139,15 +283,9 @@ async def send_project_report(db: AsyncSession, project: Project):
     
     current_scan = scans[0]
     prev_scan = scans[1] if len(scans) > 1 else None
-    total_points = current_scan.grid_size ** 2
-    
-    # Get scan points for heatmap
-    result = await db.execute(
-        select(ScanPoint).where(ScanPoint.scan_id == current_scan.id)
-    )
-    points = result.scalars().all()
+    total_points = current_scan.total_points
     
-    # Generate heatmap URL (if we have points)
+    # Generate heatmap URL
     heatmap_url = None
     # Note: For image in WhatsApp, you'd need to upload the image to a public URL
     # or use base64 encoding depending on your gateway's capabilities
@@ -193,7 +331,9 @@ async def send_single_project_report(project_id: str) -> dict:
     
     async with AsyncSessionLocal() as db:
         result = await db.execute(
-            select(Project).where(Project.id == project_id)
+            select(Project)
+            .options(undefer(Project.weekly_actions))
+            .where(Project.id == project_id)
         )
         project = result.scalar_one_or_none()
         
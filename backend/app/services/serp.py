@@ -2,15 +2,17 @@
 GBP Audit Bot - Scale SERP API Integration
 
 Async client for fetching local search rankings from Scale SERP API.
-Implements batching strategy from api-serp.md to avoid rate limiting.
+Caps in-flight requests (api-serp.md batching strategy) to avoid rate limiting.
 """
 import asyncio
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import List, Optional, Sequence
 import httpx
+import orjson
 
 from app.config import get_settings
 from app.services.geogrid import GridPoint
+from app.services.http_client import http_client
 
 
 settings = get_settings()
@@ -52,7 +54,7 @@ async def fetch_rank_at_point(
     params = {
         "api_key": api_key,
         "q": keyword,
-        "location": f"geo:{point.latitude},{point.longitude}",
+        "location": f"geo:{point.latitude:.6f},{point.longitude:.6f}",
         "google_domain": "google.com.br",
         "gl": "br",
         "hl": "pt",
@@ -77,19 +79,22 @@ async def fetch_rank_at_point(
                 serp_data={"error": f"API returned {response.status_code}"}
             )
         
-        data = response.json()
+        # orjson is several times faster than httpx's stdlib json on
+        # these 50-200 KB payloads
+        data = orjson.loads(response.content)
+        business_key = business_name.casefold()
         
         # Search in local results first (Google Maps / Local Pack)
         rank_position = _find_business_in_results(
             data.get("local_results", []),
-            business_name
+            business_key
         )
         
         # If not in local results, check organic results
         if rank_position is None:
             rank_position = _find_business_in_results(
                 data.get("organic_results", []),
-                business_name
+                business_key
             )
         
         return RankResult(
@@ -112,45 +117,46 @@ async def fetch_rank_at_point(
         )
 
 
-def _find_business_in_results(results: List[dict], business_name: str) -> Optional[int]:
+def _find_business_in_results(results: List[dict], business_key: str) -> Optional[int]:
     """
     Find a business in SERP results by name matching.
     
-    Uses case-insensitive partial matching.
+    Uses case-insensitive partial matching (casefold, so e.g. "ß"/"ss"
+    and other Unicode case variants compare equal).
     
     Args:
         results: List of SERP result items
-        business_name: Name to search for
+        business_key: Casefolded name to search for
     
     Returns:
         1-indexed position if found, None otherwise
     """
-    business_lower = business_name.lower()
-    
     for idx, result in enumerate(results):
-        title = result.get("title", "").lower()
-        # Also check 'name' field used in some local results
-        name = result.get("name", "").lower()
-        
-        if business_lower in title or business_lower in name:
+        # Also check 'name' field used in some local results; only fold
+        # it when the title didn't match
+        if (
+            business_key in (result.get("title") or "").casefold()
+            or business_key in (result.get("name") or "").casefold()
+        ):
             return idx + 1  # 1-indexed position
     
     return None
 
 
 async def process_grid_search(
-    points: List[GridPoint],
+    points: Sequence[GridPoint],
     business_name: str,
     keyword: str,
     api_key: Optional[str] = None
 ) -> List[RankResult]:
     """
-    Process a full grid search with async batching.
+    Process a full grid search with bounded concurrency.
     
     Follows the optimization strategy from api-serp.md:
     - Uses httpx for async requests
-    - Batches requests in groups of 5 to avoid rate limiting
-    - Adds small delay between batches
+    - At most settings.serp_batch_size requests in flight, to avoid
+      rate limiting; each finished request immediately frees a slot
+      instead of waiting for the rest of its batch
     
     Args:
         points: List of GridPoint from generate_geogrid()
@@ -166,30 +172,24 @@ async def process_grid_search(
     if not key:
         raise ValueError("Scale SERP API key is required")
     
-    results: List[RankResult] = []
-    batch_size = settings.serp_batch_size
-    delay = settings.serp_batch_delay_seconds
-    
-    async with httpx.AsyncClient() as client:
-        # Process in batches
-        for i in range(0, len(points), batch_size):
-            batch = points[i:i + batch_size]
-            
-            # Create tasks for this batch
-            tasks = [
-                fetch_rank_at_point(client, point, business_name, keyword, key)
-                for point in batch
-            ]
-            
-            # Execute batch concurrently
-            batch_results = await asyncio.gather(*tasks)
-            results.extend(batch_results)
-            
-            # Add delay between batches (except after last batch)
-            if i + batch_size < len(points):
-                await asyncio.sleep(delay)
-    
-    return results
+    semaphore = asyncio.Semaphore(max(1, settings.serp_batch_size))
+    
+    async with http_client() as client:
+        async def fetch(point: GridPoint) -> RankResult:
+            async with semaphore:
+                return await fetch_rank_at_point(client, point, business_name, keyword, key)
+        
+        # fetch_rank_at_point reports request errors as results; anything
+        # else cancels the remaining requests instead of leaving them
+        # running (and spending credits) behind a failed scan.
+        # gather preserves input order.
+        tasks = [asyncio.ensure_future(fetch(point)) for point in points]
+        try:
+            return list(await asyncio.gather(*tasks))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
 
 
 def extract_ranks_from_results(results: List[RankResult]) -> List[Optional[int]]:
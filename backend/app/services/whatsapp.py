@@ -5,11 +5,14 @@ Integration with WhatsApp gateways (Evolution API, Z-API, etc.)
 for sending weekly reports to client groups.
 Based on pdf-script.md specifications.
 """
+import asyncio
 import httpx
-from typing import Optional
+from functools import lru_cache
+from typing import NamedTuple, Optional
 from dataclasses import dataclass
 
 from app.config import get_settings
+from app.services.http_client import http_client
 
 
 settings = get_settings()
@@ -24,6 +27,40 @@ class WhatsAppMessage:
     image_base64: Optional[str] = None
 
 
+class _Gateway(NamedTuple):
+    """Request headers and endpoints for one gateway URL + key."""
+    headers: dict
+    send_text_url: str
+    send_media_url: str
+
+
+@lru_cache(maxsize=16)
+def _gateway(url: str, key: str) -> _Gateway:
+    """Built once per gateway; httpx copies headers, so sharing is safe."""
+    return _Gateway(
+        headers={"apikey": key, "Content-Type": "application/json"},
+        send_text_url=f"{url}/message/sendText",
+        send_media_url=f"{url}/message/sendMedia"
+    )
+
+
+# Weekly report layout; {insight} and {dashboard} are optional blocks that
+# carry their own leading blank line
+_WEEKLY_REPORT_TEMPLATE = (
+    "🚀 *Relatório Semanal: {business_name}*\n"
+    "📅 _Período: {period_start} a {period_end}_\n"
+    "\n"
+    "📊 *Resumo de Performance:*\n"
+    "• Posição Média na Grade: *{avg_rank:.1f}* ({trend_text})\n"
+    "• Pontos no Top 3: *{top3_count} de {total_points}*\n"
+    "• Visibilidade: *{visibility_score:.0f}%*"
+    "{insight}"
+    "{dashboard}\n"
+    "\n"
+    "💻 *Equipe Locuz* ⚡"
+)
+
+
 def format_weekly_report_message(
     business_name: str,
     avg_rank: float,
@@ -60,39 +97,18 @@ def format_weekly_report_message(
     else:
         trend_text = "Primeira análise"
     
-    # Build message parts
-    message_parts = [
-        f"🚀 *Relatório Semanal: {business_name}*",
-        f"📅 _Período: {period_start} a {period_end}_",
-        "",
-        "📊 *Resumo de Performance:*",
-        f"• Posição Média na Grade: *{avg_rank:.1f}* ({trend_text})",
-        f"• Pontos no Top 3: *{top3_count} de {total_points}*",
-        f"• Visibilidade: *{visibility_score:.0f}%*",
-    ]
-    
-    # Add insight if available
-    if insight:
-        message_parts.extend([
-            "",
-            "📍 *Análise da Equipe:*",
-            f"_{insight}_"
-        ])
-    
-    # Add dashboard link
-    if dashboard_url:
-        message_parts.extend([
-            "",
-            f"🔗 Dashboard completo: {dashboard_url}"
-        ])
-    
-    # Footer
-    message_parts.extend([
-        "",
-        "💻 *Equipe Locuz* ⚡"
-    ])
-    
-    return "\n".join(message_parts)
+    return _WEEKLY_REPORT_TEMPLATE.format(
+        business_name=business_name,
+        period_start=period_start,
+        period_end=period_end,
+        avg_rank=avg_rank,
+        trend_text=trend_text,
+        top3_count=top3_count,
+        total_points=total_points,
+        visibility_score=visibility_score,
+        insight=f"\n\n📍 *Análise da Equipe:*\n_{insight}_" if insight else "",
+        dashboard=f"\n\n🔗 Dashboard completo: {dashboard_url}" if dashboard_url else ""
+    )
 
 
 async def send_whatsapp_message(
@@ -104,6 +120,8 @@ async def send_whatsapp_message(
     Send a message to WhatsApp via gateway API.
     
     Supports Evolution API format, adaptable to other gateways.
+    Timeouts, connection errors and 5xx responses are retried with
+    exponential backoff, up to settings.whatsapp_send_attempts tries.
     
     Args:
         message: WhatsAppMessage with group_id, caption, and optional image
@@ -119,10 +137,7 @@ async def send_whatsapp_message(
     if not url or not key:
         raise ValueError("WhatsApp API URL and key must be configured")
     
-    headers = {
-        "apikey": key,
-        "Content-Type": "application/json"
-    }
+    gateway = _gateway(url, key)
     
     # Build payload based on whether we have an image
     if message.image_url:
@@ -132,7 +147,7 @@ async def send_whatsapp_message(
             "caption": message.caption,
             "mediaType": "image"
         }
-        endpoint = f"{url}/message/sendMedia"
+        endpoint = gateway.send_media_url
     elif message.image_base64:
         payload = {
             "number": message.group_id,
@@ -140,18 +155,32 @@ async def send_whatsapp_message(
             "caption": message.caption,
             "mediaType": "image"
         }
-        endpoint = f"{url}/message/sendMedia"
+        endpoint = gateway.send_media_url
     else:
         payload = {
             "number": message.group_id,
             "text": message.caption
         }
-        endpoint = f"{url}/message/sendText"
-    
-    async with httpx.AsyncClient() as client:
-        response = await client.post(endpoint, json=payload, headers=headers, timeout=30.0)
-        response.raise_for_status()
-        return response.json()
+        endpoint = gateway.send_text_url
+    
+    attempts = max(1, settings.whatsapp_send_attempts)
+    async with http_client() as client:
+        for attempt in range(attempts):
+            if attempt:
+                await asyncio.sleep(2 ** (attempt - 1))
+            try:
+                response = await asyncio.wait_for(
+                    client.post(endpoint, json=payload, headers=gateway.headers),
+                    timeout=settings.whatsapp_send_timeout
+                )
+                response.raise_for_status()
+                return response.json()
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code < 500 or attempt == attempts - 1:
+                    raise
+            except (asyncio.TimeoutError, httpx.TransportError):
+                if attempt == attempts - 1:
+                    raise
 
 
 async def send_weekly_report(
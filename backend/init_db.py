@@ -1,27 +1,39 @@
 """
 GBP Audit Bot - Database Initialization Script
 
-Creates all database tables based on SQLAlchemy models.
-Run this once after setting up your PostgreSQL database.
+Creates all database tables by applying the Alembic migrations
+(equivalent to `alembic upgrade head`). Run this once after setting up
+your PostgreSQL database, and again after pulling new migrations.
 
 Usage:
     python init_db.py
 """
 import asyncio
 import sys
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
 
 from app.database import engine
 from app.models.models import Base
 
 
-async def init_db():
-    """Create all database tables."""
+ALEMBIC_INI = Path(__file__).with_name("alembic.ini")
+
+
+def init_db():
+    """Create all database tables (apply migrations up to head)."""
     print("🔄 Conectando ao banco de dados...")
     
     try:
-        async with engine.begin() as conn:
-            print("📦 Criando tabelas...")
-            await conn.run_sync(Base.metadata.create_all)
+        print("📦 Criando tabelas...")
+        # One transaction of precomputed DDL; no per-table reflection
+        command.upgrade(
+            Config(str(ALEMBIC_INI), attributes={"configure_logger": False}),
+            "head"
+        )
         
         print("✅ Banco de dados inicializado com sucesso!")
         print("\nTabelas criadas:")
@@ -37,6 +49,7 @@ async def drop_all():
     """Drop all tables (use with caution!)."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
+        await conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
     print("⚠️  Todas as tabelas foram removidas!")
 
 
@@ -48,4 +61,4 @@ if __name__ == "__main__":
         else:
             print("Operação cancelada.")
     else:
-        asyncio.run(init_db())
+        init_db()
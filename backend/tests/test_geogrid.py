@@ -10,9 +10,12 @@ from app.services.geogrid import (
     calculate_visibility_score,
     calculate_average_rank,
     get_rank_color,
+    get_rank_colors,
     count_top3,
     count_top10,
     calculate_scan_stats,
+    calculate_scan_stats_batch,
+    rank_matrix,
     GridPoint,
     ScanStats
 )
@@ -119,6 +122,14 @@ class TestGenerateGeogrid:
         for p in points:
             assert -23.0 < p.latitude < -22.9
             assert -43.25 < p.longitude < -43.1
+    
+    def test_repeat_calls_share_cached_grid(self):
+        """Same center/radius/size returns the same immutable grid."""
+        first = generate_geogrid(-22.9711, -43.1825, 2.0, 3)
+        assert generate_geogrid(-22.9711, -43.1825, 2, 3) is first
+        assert isinstance(first, tuple)
+        with pytest.raises(AttributeError):
+            first[0].latitude = 0.0
 
 
 class TestEstimateCredits:
@@ -198,6 +209,28 @@ class TestGetRankColor:
         assert get_rank_color(None) == "red"
 
 
+class TestGetRankColors:
+    """Tests for the bulk rank color lookup."""
+    
+    def test_matches_get_rank_color(self):
+        ranks = [None, 0, 1, 3, 4, 10, 11, 20, 21, 99]
+        assert get_rank_colors(ranks) == [get_rank_color(r) for r in ranks]
+    
+    def test_numpy_fallback_matches_kernel(self):
+        from app.services.geogrid import (
+            _rank_color_codes_loop, _rank_color_codes_numpy, _RANK_COLOR_CODES
+        )
+        import numpy as np
+        ranks = np.arange(-2, 25, dtype=np.int64)
+        assert (
+            _rank_color_codes_numpy(ranks, _RANK_COLOR_CODES).tolist()
+            == _rank_color_codes_loop(ranks, _RANK_COLOR_CODES).tolist()
+        )
+    
+    def test_empty(self):
+        assert get_rank_colors([]) == []
+
+
 class TestCountTop3:
     """Tests for the count_top3 function (esqueleto.md KPI)."""
     
@@ -257,6 +290,15 @@ class TestCalculateScanStats:
         assert stats.visibility_score == calculate_visibility_score(ranks, 3)
         assert stats.total_points == 9
     
+    def test_not_found_anywhere(self):
+        """A grid with no matches has no ARP and zero visibility."""
+        stats = calculate_scan_stats([None] * 25, 5)
+        
+        assert stats.arp is None
+        assert stats.top3 == 0
+        assert stats.top10 == 0
+        assert stats.visibility_score == 0
+    
     def test_esqueleto_format(self):
         """Stats should be in the format expected by esqueleto.md AI analysis."""
         ranks = [1, 2, 3, 4, 5, 6, 7, 8, 9]  # All found, average 5
@@ -266,3 +308,32 @@ class TestCalculateScanStats:
         assert stats.top3 == 3
         assert stats.total_points == 9
 
+
+
+class TestCalculateScanStatsBatch:
+    """Tests for the calculate_scan_stats_batch function."""
+    
+    def test_rows_match_scalar_stats(self):
+        """Each row should equal calculate_scan_stats for that scan."""
+        scans = [
+            [1, 2, 3, 5, 8, 10, 12, None, None],
+            [1, 2, 3, 4, 5, 6, 7, 8, 9],
+            [None] * 9,
+        ]
+        batch = calculate_scan_stats_batch(*rank_matrix(scans), 3)
+        
+        assert batch.total_points == 9
+        for i, ranks in enumerate(scans):
+            stats = calculate_scan_stats(ranks, 3)
+            if stats.arp is None:
+                assert math.isnan(batch.arp[i])
+            else:
+                assert batch.arp[i] == stats.arp
+            assert batch.top3[i] == stats.top3
+            assert batch.top10[i] == stats.top10
+            assert batch.visibility_score[i] == stats.visibility_score
+    
+    def test_empty_batch(self):
+        batch = calculate_scan_stats_batch(*rank_matrix([]), 5)
+        assert len(batch.arp) == 0
+        assert batch.total_points == 25
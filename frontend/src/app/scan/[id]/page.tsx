@@ -114,8 +114,8 @@ export default function ScanDetailPage() {
 
     setIsExporting(true);
     try {
-      // Capture heatmap as base64 image
-      let heatmapBase64: string | undefined;
+      // Capture heatmap as a PNG blob
+      let heatmapBlob: Blob | null = null;
       if (mapContainerRef.current) {
         try {
           const canvas = await html2canvas(mapContainerRef.current, {
@@ -124,7 +124,9 @@ export default function ScanDetailPage() {
             backgroundColor: '#1C1E21',
             scale: 2, // Higher quality
           });
-          heatmapBase64 = canvas.toDataURL('image/png');
+          heatmapBlob = await new Promise<Blob | null>((resolve) =>
+            canvas.toBlob(resolve, 'image/png')
+          );
         } catch (captureError) {
           console.warn('Failed to capture heatmap:', captureError);
         }
@@ -144,16 +146,19 @@ export default function ScanDetailPage() {
         top3_count: stats.top3Count,
         top10_count: stats.top10Count,
         total_points: stats.totalPoints,
-        heatmap_base64: heatmapBase64,
       };
 
+      // Send metrics as JSON and the heatmap as a raw PNG upload
+      const formData = new FormData();
+      formData.append('data', JSON.stringify(payload));
+      if (heatmapBlob) {
+        formData.append('heatmap', heatmapBlob, 'heatmap.png');
+      }
+
       // Call backend API
-      const response = await fetch('http://localhost:8000/api/reports/pdf/generate', {
+      const response = await fetch('http://localhost:8000/api/reports/pdf/generate/upload', {
         method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify(payload),
+        body: formData,
       });
 
       if (!response.ok) {